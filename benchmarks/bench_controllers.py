@@ -0,0 +1,55 @@
+import numpy as np
+
+from harness import benchmark
+from src.InvertedPendulum import InvertedPendulum
+from src.SynthesisCache import synthesis_cache
+from src.controllers import (FiniteHorizonController, LQRController, MPCController, PIDController,
+                             PolePlacementController)
+
+controllers = {'PID': lambda model: PIDController.Control(model),
+               'PolePlacement': lambda model: PolePlacementController.Control(model),
+               'LQR': lambda model: LQRController.Control(model),
+               'FiniteHorizon': lambda model: FiniteHorizonController.Control(model),
+               'FiniteHorizon.riccati': lambda model: FiniteHorizonController.Control(model, method='riccati'),
+               'MPC': lambda model: MPCController.Control(model),
+               'MPC.condensed': lambda model: MPCController.Control(model, backend='condensed')}
+
+
+# Latency of one control call on the pendulum
+@benchmark('controller.control', params=list(controllers))
+def control(name):
+    controller = controllers[name](InvertedPendulum())
+    state = np.array([0.1, 0.0, 0.1, 0.0])
+    return lambda: controller.control(state)
+
+
+# Construction time without the synthesis cache versus the horizon N
+def finite_horizon(method, N):
+    synthesis_cache.clear()
+    FiniteHorizonController.Control(InvertedPendulum(), method=method, N=N)
+
+
+@benchmark('controller.construct.FiniteHorizon', params=[10, 50, 100, 200, 400])
+def construct_finite_horizon(N):
+    return lambda: finite_horizon('dense', N)
+
+
+@benchmark('controller.construct.FiniteHorizon.riccati', params=[10, 50, 100, 200, 400])
+def construct_finite_horizon_riccati(N):
+    return lambda: finite_horizon('riccati', N)
+
+
+# Construction time of the MPC controller including its first control call, in which cvxpy compiles the problem
+def mpc(backend, N):
+    synthesis_cache.clear()
+    MPCController.Control(InvertedPendulum(), backend=backend, N=N).control(np.array([0.1, 0.0, 0.1, 0.0]))
+
+
+@benchmark('controller.construct.MPC', params=[10, 50, 100, 200, 400])
+def construct_mpc(N):
+    return lambda: mpc('cvxpy', N)
+
+
+@benchmark('controller.construct.MPC.condensed', params=[10, 50, 100, 200, 400])
+def construct_mpc_condensed(N):
+    return lambda: mpc('condensed', N)
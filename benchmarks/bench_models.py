@@ -0,0 +1,37 @@
+import numpy as np
+
+from harness import benchmark
+from src.BalancingRobot import BalancingRobot
+from src.Integrators import RK4, DormandPrince
+from src.InvertedPendulum import InvertedPendulum
+
+models = {'InvertedPendulum': InvertedPendulum, 'BalancingRobot': BalancingRobot}
+states = {'InvertedPendulum': [0.1, 0.0, 0.1, 0.0], 'BalancingRobot': [0.1, 0.0]}
+
+
+@benchmark('model.step_cont', params=list(models))
+def step_cont(name):
+    model = models[name]()
+    model.set_state(np.array(states[name]))
+    return lambda: model.step_cont(0.1, out=model.state)
+
+
+@benchmark('model.step_cont.allocating', params=list(models))
+def step_cont_allocating(name):
+    model = models[name]()
+    model.set_state(np.array(states[name]))
+    return lambda: model.step_cont(0.1)
+
+
+@benchmark('model.step_cont.integrator', params=['RK4', 'DormandPrince'])
+def step_cont_integrator(name):
+    model = InvertedPendulum(RK4() if name == 'RK4' else DormandPrince())
+    model.set_state(np.array(states['InvertedPendulum']))
+    return lambda: model.step_cont(0.1, out=model.state)
+
+
+# The open-loop linearization diverges from any other state, so it is timed at the equilibrium
+@benchmark('model.step_disc', params=list(models))
+def step_disc(name):
+    model = models[name]()
+    return lambda: model.step_disc(0.0)
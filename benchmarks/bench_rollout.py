@@ -0,0 +1,42 @@
+import numpy as np
+
+from harness import benchmark
+from src.Engine import run
+from src.InvertedPendulum import InvertedPendulum
+from src.Kernels import JIT
+from src.Rollout import rollout
+from src.controllers import LQRController
+
+steps = 1000
+
+
+def initial_states(batch):
+    return np.random.default_rng(0).normal(0.0, 0.1, (batch, 4))
+
+
+# Closed loop of the engine, Python calls per step
+@benchmark('loop.engine.LQR', items=lambda param: steps)
+def engine():
+    model = InvertedPendulum()
+    controller = LQRController.Control(model)
+    return lambda: (model.set_state(np.array([0.1, 0.0, 0.1, 0.0])), run(model, controller, steps))
+
+
+# Fused rollout throughput (steps per second) versus the batch size
+def batched_rollout(batch, jit):
+    model = InvertedPendulum()
+    controller = LQRController.Control(model)
+    x0s = initial_states(batch)
+    rollout(model, controller, x0s[:1], 1, jit=jit)
+    return lambda: rollout(model, controller, x0s, steps, jit=jit)
+
+
+@benchmark('rollout.LQR.numpy', params=[1, 16, 256, 4096], items=lambda batch: batch * steps)
+def rollout_numpy(batch):
+    return batched_rollout(batch, False)
+
+
+if JIT:
+    @benchmark('rollout.LQR.numba', params=[1, 16, 256, 4096], items=lambda batch: batch * steps)
+    def rollout_numba(batch):
+        return batched_rollout(batch, True)
@@ -0,0 +1,69 @@
+import json
+import platform
+import time
+import timeit
+
+import numpy as np
+
+# Minimal timeit-based benchmark harness. A benchmark is a setup function, registered with @benchmark, that returns
+# the callable to time, so that the setup itself is not measured. Parameterized benchmarks are set up and timed once
+# per parameter value.
+
+registry = []
+
+
+def benchmark(name, params=(None,), items=None):
+    def register(setup):
+        registry.append((name, params, items, setup))
+        return setup
+    return register
+
+
+# Time a callable: the number of calls per measurement is chosen so that a measurement takes at least min_time, and
+# the best of 'repeat' measurements is reported
+def measure(func, min_time=0.2, repeat=5):
+    timer = timeit.Timer(func)
+    number, duration = timer.autorange()
+    number = max(1, int(number * min_time / max(duration, 1e-9)))
+    times = np.array(timer.repeat(repeat, number)) / number
+    return {'number': number, 'repeat': repeat, 'best': float(np.min(times)), 'median': float(np.median(times)),
+            'max': float(np.max(times))}
+
+
+def run(pattern='', min_time=0.2, repeat=5):
+    results = []
+    for name, params, items, setup in registry:
+        if pattern not in name:
+            continue
+        for param in params:
+            func = setup() if param is None else setup(param)
+            result = {'name': name, 'param': param}
+            result.update(measure(func, min_time, repeat))
+
+            # Throughput of benchmarks that process several items (steps) per call
+            count = 1 if items is None else items(param)
+            result['items'] = count
+            result['items_per_second'] = count / result['best']
+            results.append(result)
+            print('%-40s %-22s %12.2f us %16.0f /s' % (name, '' if param is None else param, 1e6 * result['best'],
+                                                       result['items_per_second']))
+    return results
+
+
+def save(path, results):
+    with open(path, 'w') as f:
+        json.dump({'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'), 'python': platform.python_version(),
+                   'numpy': np.__version__, 'machine': platform.machine(), 'processor': platform.processor(),
+                   'results': results}, f, indent=1)
+
+
+# Compare with a previous results file, returns the benchmarks whose best time increased by more than the threshold
+def compare(path, results, threshold=0.2):
+    with open(path) as f:
+        baseline = {(r['name'], str(r['param'])): r['best'] for r in json.load(f)['results']}
+    regressions = []
+    for result in results:
+        key = (result['name'], str(result['param']))
+        if key in baseline and result['best'] > (1 + threshold) * baseline[key]:
+            regressions.append((key, baseline[key], result['best']))
+    return regressions
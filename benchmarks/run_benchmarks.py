@@ -0,0 +1,35 @@
+import argparse
+import os
+import sys
+
+# Run from any directory, the repository root holds the src package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import harness
+import bench_models
+import bench_controllers
+import bench_rollout
+
+# Runs the benchmarks of the models, the controllers and the simulation loop and writes the results as JSON, e.g.
+# python benchmarks/run_benchmarks.py -o results.json --compare baseline.json
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-o', '--output', default='benchmark_results.json', help='JSON results file')
+    parser.add_argument('-k', '--filter', default='', help='only run benchmarks whose name contains this string')
+    parser.add_argument('--min-time', type=float, default=0.2, help='minimum duration of one measurement (s)')
+    parser.add_argument('--compare', help='previous JSON results file to check for regressions')
+    parser.add_argument('--threshold', type=float, default=0.2, help='relative slowdown reported as regression')
+    args = parser.parse_args()
+
+    results = harness.run(args.filter, args.min_time)
+    harness.save(args.output, results)
+
+    # Exit with an error when a hot path became slower than the baseline
+    if args.compare:
+        regressions = harness.compare(args.compare, results, args.threshold)
+        for (name, param), before, after in regressions:
+            print('Regression: %s %s %.2f us -> %.2f us' % (name, '' if param == 'None' else param, 1e6 * before,
+                                                           1e6 * after))
+        sys.exit(1 if regressions else 0)
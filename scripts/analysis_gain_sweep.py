@@ -0,0 +1,44 @@
+import sys
+import time
+
+from src.InvertedPendulum import *
+from src.GainSweep import *
+from src.SynthesisCache import synthesis_cache
+
+# This script sweeps the LQR weights and the pole locations of the pendulum and writes the gains, the closed-loop
+# eigenvalues and the simulation metrics of every grid point to .npz tables
+
+
+if __name__ == "__main__":
+
+    prefix = sys.argv[1] if len(sys.argv) > 1 else 'gain_sweep'
+
+    # Insert model
+    model = InvertedPendulum()
+
+    # Initial states [m, m/s, rad, rad/s] of the simulations of every grid point
+    x0s = np.array([[-0.3, 0.0, 0.1, 0.0], [0.3, 0.0, -0.1, 0.0], [0.0, 0.0, 0.2, 0.0], [0.5, 0.0, 0.0, 0.5]])
+
+    # Q = diag(q_x, q_xdot, q_theta, q_thetadot), R = r
+    q_diagonals = grid(np.logspace(0, 3, 7), np.logspace(0, 2, 3), np.logspace(0, 2, 3), np.logspace(0, 2, 5))
+    r = np.ones(len(q_diagonals))
+    t0 = time.perf_counter()
+    lqr_table = sweep_lqr(model, q_diagonals, r, x0s)
+    t1 = time.perf_counter()
+    save_table(prefix + '_lqr.npz', lqr_table)
+    best = np.argmin(np.where(lqr_table['stable'], lqr_table['ise'], np.inf))
+    print('LQR: %d grid points in %.2f s, best Q diagonal %s with ISE %.4f, K = %s' % (
+        len(r), t1 - t0, lqr_table['q'][best], lqr_table['ise'][best], lqr_table['K'][best]))
+
+    # Real pole sets scaled from the slowest to the fastest
+    poles = grid(-np.linspace(1, 4, 7), -np.linspace(5, 8, 4), [-9.0], [-10.0])
+    t0 = time.perf_counter()
+    pole_table = sweep_poles(model, poles, x0s)
+    t1 = time.perf_counter()
+    save_table(prefix + '_poles.npz', pole_table)
+    best = np.argmin(np.where(pole_table['stable'], pole_table['ise'], np.inf))
+    print('Pole placement: %d grid points in %.2f s, best poles %s with ISE %.4f, K = %s' % (
+        len(poles), t1 - t0, pole_table['poles_real'][best], pole_table['ise'][best], pole_table['K'][best]))
+
+    # Hits and misses of the CARE solutions
+    print(synthesis_cache)
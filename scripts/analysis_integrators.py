@@ -0,0 +1,35 @@
+import time
+
+from src.InvertedPendulum import *
+from src.Integrators import *
+
+# This script compares the accuracy and the cost of the different integrators on a swing-up like trajectory
+
+
+def simulate(integrator, steps=200):
+
+    # Start near the bottom position and excite the cart with a sine wave input
+    model = InvertedPendulum(integrator)
+    model.set_state(np.array([0.0, 0.0, 3.0, 0.0]))
+    t0 = time.perf_counter()
+    for i in range(steps):
+        model.step_cont(5 * sin(i * model.dt * 5))
+    t1 = time.perf_counter()
+
+    return model.state, t1 - t0
+
+
+if __name__ == "__main__":
+
+    # Reference solution with a very tight tolerance
+    reference, _ = simulate(DormandPrince(rtol=1e-12, atol=1e-12))
+
+    # Compare integrators
+    integrators = [ExplicitEuler(1), ExplicitEuler(10), SemiImplicitEuler(1), SemiImplicitEuler(10), RK4(1), RK4(10),
+                   DormandPrince(rtol=1e-3, atol=1e-6), DormandPrince()]
+    print('%-20s %10s %12s %12s %10s' % ('Integrator', 'Substeps', 'Error', 'Evaluations', 'Time (s)'))
+    for integrator in integrators:
+        state, duration = simulate(integrator)
+        error = np.max(np.abs(state - reference))
+        print('%-20s %10s %12.3e %12d %10.4f' % (type(integrator).__name__, getattr(integrator, 'substeps', '-'),
+                                                 error, integrator.evaluations, duration))
@@ -14,10 +14,10 @@ def lqr(A, B, Q, R):
     cost = integral x.T*Q*x + u.T*R*u
     """
     # first, try to solve the ricatti equation
-    X = np.mat(scipy.linalg.solve_continuous_are(A, B, Q, R))
+    X = scipy.linalg.solve_continuous_are(A, B, Q, R)
     
     # compute the LQR gain
-    K = np.mat(scipy.linalg.inv(R) * (B.T * X))
+    K = scipy.linalg.inv(R) @ (B.T @ X)
     
     return K
 
@@ -48,5 +48,5 @@ if __name__ == "__main__":
     print('\nK= ', K)
 
     # Verification of Eigen values of A-BK
-    w_, v_ = np.linalg.eig(A - B * K)
+    w_, v_ = np.linalg.eig(A - B @ K)
     print("\nEigenvalues of A-BK: \n" + str(w_))
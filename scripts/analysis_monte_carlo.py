@@ -0,0 +1,30 @@
+import sys
+import time
+
+from src.InvertedPendulum import *
+from src.MonteCarlo import *
+from src.controllers import LQRController, MPCController
+
+# This script estimates the robustness of the LQR and MPC controllers of the pendulum over random initial states and
+# perturbed physical parameters. Pass the number of runs and worker processes as arguments.
+
+
+# Condensed MPC, a module-level function so that it can be sent to the worker processes
+def mpc_controller(model):
+    return MPCController.Control(model, backend='condensed')
+
+
+if __name__ == "__main__":
+
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else None
+
+    # Initial states [m, m/s, rad, rad/s] and +-10 % on the masses, the length and the damping
+    scenarios = UniformScenarios([-0.5, 0.0, -0.2, -0.2], [0.5, 0.0, 0.2, 0.2], m=(0.45, 0.55), M=(0.9, 1.1),
+                                 l=(0.45, 0.55), b_theta=(0.45, 0.55), b_x=(0.9, 1.1))
+
+    for name, controller_factory in [('LQR', LQRController.Control), ('MPC', mpc_controller)]:
+        t0 = time.perf_counter()
+        results = monte_carlo(InvertedPendulum, controller_factory, scenarios, runs, steps=1000, workers=workers)
+        t1 = time.perf_counter()
+        print('%s, %.2f s\n%s\n' % (name, t1 - t0, results))
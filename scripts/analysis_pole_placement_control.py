@@ -25,5 +25,5 @@ print('\nPole Placement to eigenvalues: ' + str(desired_eigenvalues))
 print('K= ', K)
 
 # Verification of Eigen values of A-BK
-w_, v_ = np.linalg.eig(A - B * K)
+w_, v_ = np.linalg.eig(A - B @ K)
 print("\nEigenvalues of A-BK: \n" + str(w_))
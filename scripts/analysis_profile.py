@@ -0,0 +1,33 @@
+import sys
+
+from src.InvertedPendulum import *
+from src.Engine import run
+from src.Profiler import Profiler
+from src.controllers import FiniteHorizonController, LQRController, MPCController, PIDController, \
+    PolePlacementController
+
+# This script profiles the closed loop of the pendulum with every controller: the time per tick spent in the
+# controller, the integration and the recording, and the ticks that miss the control period model.dt. Pass a
+# directory as argument to export the histograms as JSON.
+
+
+if __name__ == "__main__":
+
+    directory = sys.argv[1] if len(sys.argv) > 1 else None
+
+    for name, factory in [('PID', PIDController.Control), ('PolePlacement', PolePlacementController.Control),
+                          ('LQR', LQRController.Control), ('FiniteHorizon', FiniteHorizonController.Control),
+                          ('MPC', MPCController.Control)]:
+
+        # Model and controller
+        model = InvertedPendulum()
+        model.set_state(np.array([-0.3, 0.0, 0.1, 0.0]))
+        controller = factory(model)
+        controller.set_desired_position(0.3)
+
+        # Profiled headless run
+        profiler = Profiler()
+        run(model, controller, 1000, profiler=profiler)
+        print('%s, deadline %.1f ms\n%s\n' % (name, 1000 * model.dt, profiler.report()))
+        if directory:
+            profiler.save('%s/profile_%s.json' % (directory, name.lower()))
@@ -0,0 +1,29 @@
+import sys
+
+from src.InvertedPendulum import *
+from src.RealTime import *
+from src.controllers import MPCController
+
+# This script runs the MPC controller of the pendulum in real time at the control frequency of the micro controller
+# for several horizons N, and reports the overruns of the control budget, the latency of the control calls and the
+# jitter of the loop. Pass the backend ('cvxpy' or 'condensed'), the overrun policy and the slowdown of the target
+# relative to this machine as arguments.
+
+
+if __name__ == "__main__":
+
+    backend = sys.argv[1] if len(sys.argv) > 1 else 'condensed'
+    policy = sys.argv[2] if len(sys.argv) > 2 else 'fallback'
+    slowdown = float(sys.argv[3]) if len(sys.argv) > 3 else 1.0
+
+    for N in [10, 25, 50, 100, 200]:
+
+        # Model and controller
+        model = InvertedPendulum()
+        controller = MPCController.Control(model, backend=backend, N=N)
+        controller.set_desired_position(0.3)
+        model.set_state(np.array([-0.3, 0.0, 0.1, 0.0]))
+
+        # Three seconds in real time
+        time_axis, state_list, u_list, results = run_realtime(model, controller, 300, policy, slowdown=slowdown)
+        print('N = %d, final state %s\n%s\n' % (N, np.round(state_list[-1], 3), results))
@@ -0,0 +1,39 @@
+import statistics
+import subprocess
+import sys
+
+# This script measures the import time of the modules in fresh interpreters, and which heavy optional dependencies
+# each import loads. Run it from the repository root or from the scripts folder.
+
+modules = ['src.InvertedPendulum', 'src.BalancingRobot', 'src.Engine', 'src.Rollout', 'src.Simulator',
+           'src.controllers.LQRController', 'src.controllers.PolePlacementController',
+           'src.controllers.FiniteHorizonController', 'src.controllers.MPCController']
+heavy = ['matplotlib', 'cvxpy', 'control', 'numba', 'scipy']
+
+code = """
+import sys, time
+t0 = time.perf_counter()
+import %s
+t1 = time.perf_counter()
+print(t1 - t0, ' '.join(name for name in %r if name in sys.modules))
+"""
+
+
+def import_time(module, repeats):
+    times = []
+    for _ in range(repeats):
+        output = subprocess.run([sys.executable, '-c', code % (module, heavy)], capture_output=True, text=True,
+                                check=True, env={'PYTHONPATH': '.:..'}).stdout.split()
+        times.append(float(output[0]))
+    return statistics.median(times), output[1:]
+
+
+if __name__ == "__main__":
+
+    # Baseline of the interpreter with NumPy
+    baseline, _ = import_time('numpy', 5)
+    print('%-45s %10s   %s' % ('Module', 'Time (ms)', 'Heavy dependencies loaded'))
+    print('%-45s %10.1f' % ('numpy', 1000 * baseline))
+    for module in modules:
+        duration, loaded = import_time(module, 5)
+        print('%-45s %10.1f   %s' % (module, 1000 * duration, ' '.join(loaded) or '-'))
@@ -0,0 +1,31 @@
+import time
+
+from src.InvertedPendulum import *
+from src.BalancingRobot import *
+from src.controllers.LQRController import *
+from src.Kernels import *
+
+# This script measures the throughput of the rollout kernels with LQR feedback, compiled with Numba and with the
+# vectorized NumPy fallback
+
+
+if __name__ == "__main__":
+
+    batch = 1000
+    steps = 10000
+    for model in [InvertedPendulum(), BalancingRobot()]:
+
+        # LQR gain and random initial states around the upright position
+        controller = Control(model)
+        x0s = np.random.default_rng(0).normal(0.0, 0.1, (batch, len(model.state)))
+
+        for jit in ([True, False] if JIT else [False]):
+
+            # Compile outside the timing
+            rollout_kernel(model, x0s[:1], 1, K=controller.K, jit=jit)
+
+            t0 = time.perf_counter()
+            rollout_kernel(model, x0s, steps, K=controller.K, jit=jit)
+            t1 = time.perf_counter()
+            rate = batch * steps / (t1 - t0) / 1e6
+            print('%-8s %-6s %8.2f M steps/s' % (model.name, 'numba' if jit else 'numpy', rate))
@@ -0,0 +1,32 @@
+import time
+
+from src.InvertedPendulum import *
+from src.BalancingRobot import *
+from src.controllers.LQRController import *
+
+# This script measures the time of one simulation step (control + step_cont) with the ndarray fast path and with
+# (n, 1) np.matrix columns passed through the compatibility shim, as older callers did
+
+
+def time_steps(model, controller, as_matrix, steps=5000):
+    t0 = time.perf_counter()
+    for _ in range(steps):
+        state = np.asmatrix(model.state).T if as_matrix else model.state
+        model.step_cont(controller.control(state))
+    t1 = time.perf_counter()
+    return (t1 - t0) / steps
+
+
+if __name__ == "__main__":
+
+    for model, state in [(InvertedPendulum(), np.array([-0.3, 0.0, 0.1, 0.0])),
+                         (BalancingRobot(), np.array([0.1, 0.0]))]:
+
+        # LQR controller
+        controller = Control(model)
+
+        # Time both paths from the same initial state
+        for as_matrix in [False, True]:
+            model.set_state(state)
+            duration = time_steps(model, controller, as_matrix)
+            print('%-8s %-9s %8.2f us/step' % (model.name, 'matrix' if as_matrix else 'ndarray', duration * 1e6))
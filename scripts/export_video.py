@@ -0,0 +1,29 @@
+import sys
+import time
+from types import SimpleNamespace
+
+from src.InvertedPendulum import *
+from src.BalancingRobot import *
+from src.Simulator import *
+
+# This script renders a saved trajectory (.traj) to an MP4 or GIF video without a GUI, e.g.
+# python export_video.py ../data/pendulum_LQR_result.traj ../data/pendulum_LQR_result.mp4 4
+
+if __name__ == "__main__":
+
+    source, target = sys.argv[1], sys.argv[2]
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else 1
+
+    # Model of the trajectory, only the desired position of the controller is drawn
+    model = InvertedPendulum() if load_trajectory(source)[0]['model'] == 'Pendulum' else BalancingRobot()
+    sim = Simulator(model)
+    header = sim.load(source)
+    model.set_parameters(**header['parameters'])
+    sim.delta_t = model.dt = header['dt']
+    if 'xd' in header.get('gains', {}):
+        sim.control = SimpleNamespace(xd=header['gains']['xd'])
+
+    # Export
+    t0 = time.perf_counter()
+    sim.export(target, workers=workers)
+    print('Exported %d samples in %.2f s' % (len(sim.time_axis), time.perf_counter() - t0))
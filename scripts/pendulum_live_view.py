@@ -0,0 +1,24 @@
+from src.InvertedPendulum import *
+from src.Simulator import *
+from src.controllers.LQRController import *
+
+# This script shows the pendulum controlled by an LQR controller at 1 kHz, simulated live while rendering
+
+if __name__ == "__main__":
+
+    # Import model, simulated at 1 kHz
+    model = InvertedPendulum()
+    model.dt = 0.001
+
+    # Set initial state [m, m/s, rad, rad/s]
+    model.set_state(np.array([-0.3, 0.0, 0.1, 0.0]))
+
+    # Define controller
+    controller = Control(model)
+
+    # Set desired cart position (m)
+    controller.set_desired_position(0.3)
+
+    # Simulate live, the number of physics steps per frame follows the measured frame time
+    sim = Simulator(model, controller)
+    sim.live()
@@ -1,3 +1,5 @@
+import matplotlib.pyplot as plt
+
 from src.InvertedPendulum import *
 from src.Simulator import *
 from src.controllers.LQRController import *
@@ -10,7 +12,7 @@ if __name__ == "__main__":
     model = InvertedPendulum()
     
     # Set initial state [m, m/s, rad, rad/s]
-    model.set_state(np.mat([[-0.3], [0.0], [0.1], [0.0]]))
+    model.set_state(np.array([-0.3, 0.0, 0.1, 0.0]))
     
     # Define controller
     controller = Control(model)
@@ -22,6 +24,9 @@ if __name__ == "__main__":
     sim = Simulator(model, controller)
     t, state_list = sim.simulate()
 
+    # Save the trajectory in data
+    sim.save("../data/pendulum_LQR_result.traj")
+
     # Plot data
     plt.figure()
     plt.subplot(2, 2, 1)
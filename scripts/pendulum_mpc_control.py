@@ -1,3 +1,5 @@
+import matplotlib.pyplot as plt
+
 from src.InvertedPendulum import *
 from src.Simulator import *
 from src.controllers.MPCController import *
@@ -10,7 +12,7 @@ if __name__ == "__main__":
     model = InvertedPendulum()
     
     # Set initial state [m, m/s, rad, rad/s]
-    model.set_state(np.mat([[-0.3], [0.0], [0.1], [0.0]]))
+    model.set_state(np.array([-0.3, 0.0, 0.1, 0.0]))
     
     # Define controller
     controller = Control(model)
@@ -21,6 +23,13 @@ if __name__ == "__main__":
     # Simulate
     sim = Simulator(model, controller)
     t, state_list = sim.simulate()
+
+    # Save the trajectory in data
+    sim.save("../data/pendulum_MPC_result.traj")
+
+    # Report solve times of the MPC
+    print('MPC solve time per tick: mean %.2f ms, max %.2f ms' % (1000 * np.mean(controller.solve_times),
+                                                                  1000 * np.max(controller.solve_times)))
     
     # Plot data
     plt.figure()
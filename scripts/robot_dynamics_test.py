@@ -1,3 +1,5 @@
+import matplotlib.pyplot as plt
+
 from src.BalancingRobot import *
 from src.Simulator import *
 
@@ -9,7 +11,7 @@ if __name__ == "__main__":
     model = BalancingRobot()
 
     # Set initial state [m, m/s, rad, rad/s]
-    model.set_state(np.mat([[0.1], [0.0]]))
+    model.set_state(np.array([0.1, 0.0]))
 
     # Define controller
     controller = None
@@ -18,6 +20,9 @@ if __name__ == "__main__":
     sim = Simulator(model, controller)
     t, state_list = sim.simulate()
 
+    # Save the trajectory in data
+    sim.save("../data/robot_dynamics_result.traj")
+
     # Plot data
     plt.figure()
     plt.subplot(1, 2, 1)
@@ -1,10 +1,12 @@
 from math import *
 import numpy as np
 
+from src.Integrators import SemiImplicitEuler
+
 
 class BalancingRobot:
     
-    def __init__(self):
+    def __init__(self, integrator=None):
         
         # System parameters
         self.name = 'Robot'
@@ -16,17 +18,20 @@ class BalancingRobot:
         # Sample time
         self.control_freq = 100  # frequency at which the used micro controller (Arduino) loops
         self.dt = 1 / self.control_freq  # time period of one time step
+
+        # Integrator of the continuous dynamics, semi-implicit Euler by default
+        self.integrator = SemiImplicitEuler() if integrator is None else integrator
         
         # State: [theta, thetadot]
-        self.state = np.mat([[0.0], [0.0]])
-        
-        # Continuous linearized state space representation
-        self.A_cont = np.mat([[0.0, 1.0], [self.g / self.l, 0.0]])
-        self.B_cont = np.mat([[0.0], [-1.0 / self.l]])
+        self.state = np.zeros(2)
+        self.position_index = slice(0, None, 2)
+        self.velocity_index = slice(1, None, 2)
 
-        # Discrete linearized state space representation without stepper (Eulers method)
-        self.A_disc = np.identity(len(self.state)) + self.A_cont * self.dt
-        self.B_disc = self.dt * self.B_cont
+        # Derivative buffer of the in-place step
+        self.ds = np.zeros(2)
+        
+        # Linearized state space representations
+        self.linearize()
         
         # Measurement matrix
         self.C = np.array([1, 0])
@@ -34,36 +39,51 @@ class BalancingRobot:
         # Simulation time
         self.time_elapsed = 0.0
 
-    # Set an initial state
+    # Compute the linearized state space representations from the system parameters
+    def linearize(self):
+
+        # Continuous linearized state space representation
+        self.A_cont = np.array([[0.0, 1.0], [self.g / self.l, 0.0]])
+        self.B_cont = np.array([[0.0], [-1.0 / self.l]])
+
+        # Discrete linearized state space representation without stepper (Eulers method)
+        self.A_disc = np.identity(len(self.state)) + self.A_cont * self.dt
+        self.B_disc = self.dt * self.B_cont
+
+    # Change system parameters, e.g. set_parameters(m=0.6, l=0.45), and recompute the linearizations
+    def set_parameters(self, **params):
+        for name, value in params.items():
+            assert name in ('m', 'l', 'g', 'b_theta')
+            setattr(self, name, float(value))
+        self.linearize()
+
+    # Set an initial state, a (2,) array or, for compatibility, a (2, 1) column (matrix)
     def set_state(self, state):
-        assert np.shape(state) == (2, 1)
-        self.state = state
+        assert np.size(state) == 2
+        self.state = np.array(state, dtype=float).reshape(2)
 
-    # Computes the real non-linearized dynamics and returns the derivative of the state
-    def dynamics(self, state, u):
-        ds = np.zeros((2, 1))
+    # Computes the real non-linearized dynamics and returns the derivative of the state, written into 'out' if given
+    def dynamics(self, state, u, out=None):
+        ds = np.zeros(2) if out is None else out
         ds[0] = state[1]
-        ds[1] = (self.g / self.l) * sin(state[0]) - (u / self.l) * cos(state[0]) - self.b_theta * self.state[1]
+        ds[1] = (self.g / self.l) * sin(state[0]) - (u / self.l) * cos(state[0]) - self.b_theta * state[1]
         return ds
 
     # Proceed a timestep in simulation by applying discrete dynamics
     def step_disc(self, u):
 
         # Compute the discrete linearized dynamics
-        self.state = self.A_disc * self.state + self.B_disc * u
+        self.state = self.A_disc @ self.state + self.B_disc[:, 0] * u
         self.time_elapsed += self.dt
 
-    # Proceed a timestep in simulation by applying discrete dynamics
-    def step_cont(self, u):
-
-        # Compute the continuous non-linearized dynamics
-        ds = self.dynamics(self.state, u)
-
-        # Compute new state via Euler iteration
-        new_state = np.zeros((2, 1))
-        new_state[1] = self.state[1] + ds[1] * self.dt
-        new_state[0] = self.state[0] + new_state[1] * self.dt
+    # Proceed a timestep in simulation by applying continuous dynamics. If the buffer 'out' is given, which may be
+    # self.state itself, the new state is written into it with 'ds' (or self.ds) as derivative buffer, without
+    # allocating arrays
+    def step_cont(self, u, out=None, ds=None):
 
-        # Set new state and evolve time
-        self.state = new_state
+        # Integrate the continuous non-linearized dynamics over one time step
+        if out is None:
+            self.state = self.integrator.step(self, self.state, u, self.dt)
+        else:
+            self.state = self.integrator.step_into(self, self.state, u, self.dt, out, self.ds if ds is None else ds)
         self.time_elapsed += self.dt
@@ -0,0 +1,82 @@
+import numpy as np
+
+
+class BalancingRobotBatch:
+
+    def __init__(self, n, m=0.5, l=0.5, b_theta=0.5):
+
+        # Number of environments
+        self.name = 'Robot'
+        self.n = n
+
+        # System parameters, one value per environment
+        self.m = self.per_env(m)  # mass of bob (kg)
+        self.l = self.per_env(l)  # length of pendulum (m)
+        self.g = 9.81  # gravitational acceleration (m/s^2)
+        self.b_theta = self.per_env(b_theta)  # damping pendulum (Ns/m)
+
+        # Sample time
+        self.control_freq = 100  # frequency at which the used micro controller (Arduino) loops
+        self.dt = 1 / self.control_freq  # time period of one time step
+
+        # State: one row [theta, thetadot] per environment
+        self.state = np.zeros((self.n, 2))
+
+        # Continuous linearized state space representation, one (2, 2) and (2, 1) matrix per environment
+        self.A_cont = np.zeros((self.n, 2, 2))
+        self.A_cont[:, 0, 1] = 1.0
+        self.A_cont[:, 1, 0] = self.g / self.l
+        self.B_cont = np.zeros((self.n, 2, 1))
+        self.B_cont[:, 1, 0] = -1.0 / self.l
+
+        # Discrete linearized state space representation without stepper (Eulers method)
+        self.A_disc = np.identity(2) + self.A_cont * self.dt
+        self.B_disc = self.dt * self.B_cont
+
+        # Measurement matrix
+        self.C = np.array([1, 0])
+
+        # Simulation time
+        self.time_elapsed = 0.0
+
+    # Broadcast a scalar or an array of parameters to one float per environment
+    def per_env(self, value):
+        return np.array(np.broadcast_to(np.asarray(value, dtype=float), (self.n,)))
+
+    # Set the initial states, a single (2,) state is copied to all environments
+    def set_state(self, state):
+        state = np.asarray(state, dtype=float)
+        if state.shape in ((2,), (2, 1)):
+            state = np.tile(np.ravel(state), (self.n, 1))
+        assert np.shape(state) == (self.n, 2)
+        self.state = state
+
+    # Computes the real non-linearized dynamics of all environments and returns the derivatives of the states
+    def dynamics(self, state, u):
+        ds = np.empty_like(state)
+        ds[:, 0] = state[:, 1]
+        ds[:, 1] = ((self.g / self.l) * np.sin(state[:, 0]) - (u / self.l) * np.cos(state[:, 0]) -
+                    self.b_theta * state[:, 1])
+        return ds
+
+    # Proceed a timestep in simulation by applying discrete dynamics
+    def step_disc(self, u):
+
+        # Compute the discrete linearized dynamics of all environments
+        self.state = np.einsum('nij,nj->ni', self.A_disc, self.state) + self.B_disc[:, :, 0] * np.reshape(u, (-1, 1))
+        self.time_elapsed += self.dt
+
+    # Proceed a timestep in simulation by applying continuous dynamics
+    def step_cont(self, u):
+
+        # Compute the continuous non-linearized dynamics
+        ds = self.dynamics(self.state, u)
+
+        # Compute new states via Euler iteration
+        new_state = np.empty_like(self.state)
+        new_state[:, 1] = self.state[:, 1] + ds[:, 1] * self.dt
+        new_state[:, 0] = self.state[:, 0] + new_state[:, 1] * self.dt
+
+        # Set new states and evolve time
+        self.state = new_state
+        self.time_elapsed += self.dt
@@ -0,0 +1,57 @@
+from time import perf_counter_ns
+
+import numpy as np
+
+from src.Recorder import Recorder
+
+
+# One tick of the closed loop: compute the control signal (unless u is given), apply the dynamics in place and record
+# the new state of step i, stamped i * dt, if a recorder is given. Returns the control signal. With a profiler
+# (Profiler.py) the control, integration and recording phases and the whole tick, from 'start' (ns) if given, are
+# timed, and ticks longer than the deadline of the profiler (model.dt if None) count as deadline misses.
+def tick(model, controller, i, recorder=None, profiler=None, u=None, start=None):
+    if profiler is not None and start is None:
+        start = perf_counter_ns()
+
+    # Compute control signal
+    if u is None:
+        if controller:
+            u = np.asarray(controller.control(model.state)).item()
+        else:
+            u = 0.0
+        if profiler is not None:
+            profiler.add('control', perf_counter_ns() - start)
+    if profiler is not None:
+        controlled = perf_counter_ns()
+
+    # Apply dynamics
+    model.step_cont(u, out=model.state)
+    if profiler is not None:
+        integrated = perf_counter_ns()
+
+    # Capture data
+    if recorder is not None:
+        recorder.record(i * model.dt, model.state, u)
+
+    if profiler is not None:
+        end = perf_counter_ns()
+        profiler.add('integration', integrated - controlled)
+        profiler.add('recording', end - integrated)
+        profiler.add('tick', end - start, int(1e9 * (profiler.deadline or model.dt)))
+    return u
+
+
+# Runs the closed loop (control -> step_cont -> record) as fast as possible, without any rendering, and returns the
+# time axis, states and inputs. With a recorder (Recorder.py) the samples are written to it instead of to a buffer of
+# all steps, and the samples still in its ring buffer are returned. See tick for the profiler.
+def run(model, controller=None, steps=1000, recorder=None, profiler=None):
+
+    # Preallocate a buffer of all steps
+    if recorder is None:
+        recorder = Recorder(len(model.state), capacity=steps)
+
+    for i in range(steps):
+        tick(model, controller, i, recorder, profiler)
+
+    recorder.flush()
+    return recorder.recent()
@@ -0,0 +1,92 @@
+from itertools import product
+
+import numpy as np
+import scipy.linalg
+
+from src.Kernels import rollout_kernel
+from src.SynthesisCache import synthesis_cache
+
+# Sweeps of LQR weightings and pole sets. For every grid point the gain, the closed-loop eigenvalues and the metrics
+# of a closed-loop simulation from a set of initial states are computed. All grid points are simulated at once in one
+# batched rollout, and the results are returned as a columnar table: a dict of arrays with one row per grid point.
+
+
+# Stabilizing solution X of the continuous algebraic Riccati equation, cached in the synthesis cache
+def care(A, B, Q, R):
+    return synthesis_cache.get('care', (A, B, Q, R), lambda: (scipy.linalg.solve_continuous_are(A, B, Q, R),))[0]
+
+
+# Cartesian product of the given axes as a (G, len(axes)) array, e.g. the diagonals of Q
+def grid(*axes):
+    return np.array(list(product(*axes)), dtype=float).reshape(-1, len(axes))
+
+
+# Closed-loop eigenvalues and simulation metrics of the gains K (G, n), each simulated from all initial states
+def evaluate(model, K, x0s, steps):
+    G, n = K.shape
+    x0s = np.atleast_2d(np.asarray(x0s, dtype=float))
+    S = len(x0s)
+
+    # Eigenvalues of A - B K for all gains at once
+    eigenvalues = np.linalg.eigvals(np.asarray(model.A_cont) - np.asarray(model.B_cont) @ K[:, None, :])
+
+    # One batched rollout of all (gain, initial state) pairs, diverging runs may overflow
+    with np.errstate(all='ignore'):
+        states, u_list = rollout_kernel(model, np.tile(x0s, (G, 1)), steps, K=np.repeat(K, S, axis=0))
+        states = states.reshape(G, S, steps, n)
+        u_list = u_list.reshape(G, S, steps)
+        theta = np.abs(states[..., 2 if model.name == 'Pendulum' else 0])
+        max_theta = np.max(theta, axis=(1, 2))
+        ise = np.sum(states ** 2, axis=(2, 3)).mean(axis=1) * model.dt
+        effort = np.sum(u_list ** 2, axis=2).mean(axis=1) * model.dt
+
+    return {
+        'K': K,
+        'eig_real': eigenvalues.real,
+        'eig_imag': eigenvalues.imag,
+        'max_eig_real': np.max(eigenvalues.real, axis=1),
+        'stable': np.isfinite(max_theta) & (max_theta < np.pi / 2),
+        'max_theta': max_theta,
+        'ise': ise,
+        'effort': effort,
+    }
+
+
+# LQR sweep over the diagonals of Q (G, n) and the scalar weights R (G,)
+def sweep_lqr(model, q_diagonals, r, x0s, steps=500):
+    q_diagonals = np.atleast_2d(np.asarray(q_diagonals, dtype=float))
+    r = np.broadcast_to(np.asarray(r, dtype=float), (len(q_diagonals),))
+    A = np.asarray(model.A_cont)
+    B = np.asarray(model.B_cont)
+
+    # Gains K = R^-1 B' X
+    K = np.empty(q_diagonals.shape)
+    for i, (q, ri) in enumerate(zip(q_diagonals, r)):
+        K[i] = (B.T @ care(A, B, np.diag(q), [[ri]]))[0] / ri
+
+    table = {'q': q_diagonals, 'r': np.array(r)}
+    table.update(evaluate(model, K, x0s, steps))
+    return table
+
+
+# Pole placement sweep over the pole sets (G, n)
+def sweep_poles(model, poles, x0s, steps=500):
+    import control
+    poles = np.atleast_2d(np.asarray(poles))
+    A = np.asarray(model.A_cont)
+    B = np.asarray(model.B_cont)
+    K = np.array([np.asarray(control.place(A, B, p))[0] for p in poles])
+
+    table = {'poles_real': poles.real.astype(float), 'poles_imag': poles.imag.astype(float)}
+    table.update(evaluate(model, K, x0s, steps))
+    return table
+
+
+# Write a table as a compressed .npz file with one array per column
+def save_table(path, table):
+    np.savez_compressed(path, **table)
+
+
+def load_table(path):
+    with np.load(path) as data:
+        return {name: data[name] for name in data.files}
@@ -0,0 +1,235 @@
+import numpy as np
+
+# All integrators advance a model over one control period dt with a zero-order hold on the input u, the state
+# derivative is given by model.dynamics(state, u). The number of dynamics evaluations is counted in 'evaluations'
+# so that the accuracy of the integrators can be compared against their cost.
+#
+# step() returns a new state array. step_into() writes the new state into the buffer 'out', which may be the state
+# itself, and uses 'ds' as derivative buffer, so that stepping does not allocate arrays.
+
+
+class ExplicitEuler:
+
+    def __init__(self, substeps=1):
+        self.substeps = substeps
+        self.evaluations = 0
+
+    def step(self, model, state, u, dt):
+        h = dt / self.substeps
+        for _ in range(self.substeps):
+            state = state + model.dynamics(state, u) * h
+        self.evaluations += self.substeps
+        return state
+
+    def step_into(self, model, state, u, dt, out, ds):
+        h = dt / self.substeps
+        if out is not state:
+            out[:] = state
+        for _ in range(self.substeps):
+            model.dynamics(out, u, ds)
+            ds *= h
+            out += ds
+        self.evaluations += self.substeps
+        return out
+
+
+class SemiImplicitEuler:
+
+    def __init__(self, substeps=1):
+        self.substeps = substeps
+        self.evaluations = 0
+
+    def step(self, model, state, u, dt):
+        h = dt / self.substeps
+        for _ in range(self.substeps):
+            ds = model.dynamics(state, u)
+
+            # Update the velocities first and the positions with the new velocities
+            new_state = np.zeros(np.shape(state))
+            new_state[model.velocity_index] = state[model.velocity_index] + ds[model.velocity_index] * h
+            new_state[model.position_index] = state[model.position_index] + new_state[model.velocity_index] * h
+            state = new_state
+        self.evaluations += self.substeps
+        return state
+
+    def step_into(self, model, state, u, dt, out, ds):
+        h = dt / self.substeps
+        indexes = range(len(state))
+        if out is not state:
+            out[:] = state
+        for _ in range(self.substeps):
+            model.dynamics(out, u, ds)
+
+            # Update the velocities first and the positions with the new velocities, element by element as scalar
+            # operations are cheaper than array views for these small states
+            for p, v in zip(indexes[model.position_index], indexes[model.velocity_index]):
+                out[v] = out[v] + ds[v] * h
+                out[p] = out[p] + out[v] * h
+        self.evaluations += self.substeps
+        return out
+
+
+class RK4:
+
+    def __init__(self, substeps=1):
+        self.substeps = substeps
+        self.evaluations = 0
+
+        # Stage buffers of step_into, allocated at the first call
+        self.buffers = None
+
+    def step(self, model, state, u, dt):
+        h = dt / self.substeps
+        for _ in range(self.substeps):
+            k1 = model.dynamics(state, u)
+            k2 = model.dynamics(state + k1 * (h / 2), u)
+            k3 = model.dynamics(state + k2 * (h / 2), u)
+            k4 = model.dynamics(state + k3 * h, u)
+            state = state + (k1 + 2 * k2 + 2 * k3 + k4) * (h / 6)
+        self.evaluations += 4 * self.substeps
+        return state
+
+    def step_into(self, model, state, u, dt, out, ds):
+        if self.buffers is None or self.buffers.shape[1:] != np.shape(state):
+            self.buffers = np.zeros((4,) + np.shape(state))
+        k2, k3, k4, tmp = self.buffers
+        k1 = ds
+        h = dt / self.substeps
+        if out is not state:
+            out[:] = state
+        for _ in range(self.substeps):
+            model.dynamics(out, u, k1)
+            np.multiply(k1, h / 2, out=tmp)
+            tmp += out
+            model.dynamics(tmp, u, k2)
+            np.multiply(k2, h / 2, out=tmp)
+            tmp += out
+            model.dynamics(tmp, u, k3)
+            np.multiply(k3, h, out=tmp)
+            tmp += out
+            model.dynamics(tmp, u, k4)
+
+            # Weighted sum of the stages, in the same order as step()
+            k2 *= 2
+            k1 += k2
+            k3 *= 2
+            k1 += k3
+            k1 += k4
+            k1 *= h / 6
+            out += k1
+        self.evaluations += 4 * self.substeps
+        return out
+
+
+class DormandPrince:
+
+    # Butcher tableau of the Dormand-Prince 5(4) pair
+    C = np.array([0, 1 / 5, 3 / 10, 4 / 5, 8 / 9, 1])
+    A = np.array([
+        [0, 0, 0, 0, 0],
+        [1 / 5, 0, 0, 0, 0],
+        [3 / 40, 9 / 40, 0, 0, 0],
+        [44 / 45, -56 / 15, 32 / 9, 0, 0],
+        [19372 / 6561, -25360 / 2187, 64448 / 6561, -212 / 729, 0],
+        [9017 / 3168, -355 / 33, 46732 / 5247, 49 / 176, -5103 / 18656]])
+    B = np.array([35 / 384, 0, 500 / 1113, 125 / 192, -2187 / 6784, 11 / 84])
+
+    # Difference between the 5th and the embedded 4th order solution, the last stage is the FSAL derivative
+    E = np.array([-71 / 57600, 0, 71 / 16695, -71 / 1920, 17253 / 339200, -22 / 525, 1 / 40])
+
+    # Coefficients of the 4th order continuous extension (dense output)
+    P = np.array([
+        [1, -8048581381 / 2820520608, 8663915743 / 2820520608, -12715105075 / 11282082432],
+        [0, 0, 0, 0],
+        [0, 131558114200 / 32700410799, -68118460800 / 10900136933, 87487479700 / 32700410799],
+        [0, -1754552775 / 470086768, 14199869525 / 1410260304, -10690763975 / 1880347072],
+        [0, 127303824393 / 49829197408, -318862633887 / 49829197408, 701980252875 / 199316789632],
+        [0, -282668133 / 205662961, 2019193451 / 616988883, -1453857185 / 822651844],
+        [0, 40617522 / 29380423, -110615467 / 29380423, 69997945 / 29380423]])
+
+    def __init__(self, rtol=1e-6, atol=1e-9, max_steps=1000):
+        self.rtol = rtol
+        self.atol = atol
+        self.max_steps = max_steps
+        self.evaluations = 0
+        self.rejected = 0
+
+        # Step size, carried over from one control period to the next
+        self.h = None
+        self.shape = None
+
+        # Accepted steps of the last control period (of length 'period') as (t, h, y, Q) for the dense output
+        self.segments = []
+        self.period = 0.0
+
+    def step(self, model, state, u, dt):
+
+        # Integrate on a flat copy of the state
+        shape = self.shape = np.shape(state)
+        y = np.array(state, dtype=float).ravel()
+        n = len(y)
+
+        def f(x):
+            self.evaluations += 1
+            return np.ravel(model.dynamics(np.reshape(x, shape), u))
+
+        K = np.empty((7, n))
+        K[0] = f(y)
+        t = 0.0
+        h = dt if self.h is None else min(self.h, dt)
+        self.segments = []
+        self.period = dt
+
+        for _ in range(self.max_steps):
+            if t >= dt:
+                break
+            last = h >= dt - t
+            if last:
+                h = dt - t
+
+            # Stages of the Runge-Kutta step
+            for s in range(1, 6):
+                K[s] = f(y + h * np.dot(self.A[s, :s], K[:s]))
+            y_new = y + h * np.dot(self.B, K[:6])
+            K[6] = f(y_new)
+
+            # Scaled RMS norm of the local error estimate
+            scale = self.atol + np.maximum(np.abs(y), np.abs(y_new)) * self.rtol
+            error = np.sqrt(np.mean((h * np.dot(self.E, K) / scale) ** 2))
+
+            # Adapt the step size
+            if error == 0:
+                factor = 10.0
+            else:
+                factor = min(10.0, max(0.2, 0.9 * error ** -0.2))
+            if error <= 1:
+                self.segments.append((t, h, y, np.dot(K.T, self.P)))
+                t = dt if last else t + h
+                y = y_new
+                K[0] = K[6]
+                if not last:
+                    self.h = h * factor
+            else:
+                self.rejected += 1
+            h = h * factor
+        if t < dt:
+            raise RuntimeError('Dormand-Prince integration did not reach the end of the control period')
+
+        return np.reshape(y, shape)
+
+    # The adaptive integrator works on its own arrays, the result is copied into 'out'
+    def step_into(self, model, state, u, dt, out, ds):
+        out[:] = self.step(model, state, u, dt)
+        return out
+
+    # Interpolated state at time t (0 <= t <= dt) within the last integrated control period
+    def dense_output(self, t):
+        if not self.segments:
+            raise ValueError('No steps taken, the dense output is only available after a control period')
+        if not 0 <= t <= self.period:
+            raise ValueError('t = %g is outside the last control period [0, %g]' % (t, self.period))
+        for t_old, h, y_old, Q in self.segments:
+            if t <= t_old + h:
+                break
+        x = (t - t_old) / h
+        return np.reshape(y_old + h * np.dot(Q, x ** np.arange(1, 5)), self.shape)
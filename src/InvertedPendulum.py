@@ -2,10 +2,12 @@ from math import *
 
 import numpy as np
 
+from src.Integrators import SemiImplicitEuler
+
 
 class InvertedPendulum:
     
-    def __init__(self):
+    def __init__(self, integrator=None):
         
         # System parameters
         self.name = 'Pendulum'
@@ -21,18 +23,20 @@ class InvertedPendulum:
         # Sample time
         self.control_freq = 100  # frequency at which the used micro controller (Arduino) loops
         self.dt = 1 / self.control_freq  # time period of one time step
+
+        # Integrator of the continuous dynamics, semi-implicit Euler by default
+        self.integrator = SemiImplicitEuler() if integrator is None else integrator
         
         # State: [x, xdot, theta, thetadot]
-        self.state = np.mat([[0.0], [0.0], [0.0], [0.0]])
-        
-        # Continuous linearized state space representation
-        self.A_cont = np.mat([[0, 1, 0, 0], [0, -self.b_theta, -self.g * self.m / self.M, 0], [0, 0, 0, 1.],
-                              [0, self.b_theta / self.l, (self.m + self.M) * self.g / (self.M * self.l), -self.b_x]])
-        self.B_cont = np.mat([[0], [1.0 / self.M], [0], [-1 / (self.M * self.l)]])
+        self.state = np.zeros(4)
+        self.position_index = slice(0, None, 2)
+        self.velocity_index = slice(1, None, 2)
 
-        # Discrete linearized state space representation(Eulers method)
-        self.A_disc = np.identity(len(self.state)) + self.A_cont * self.dt
-        self.B_disc = self.dt * self.B_cont
+        # Derivative buffer of the in-place step
+        self.ds = np.zeros(4)
+        
+        # Linearized state space representations
+        self.linearize()
         
         # Measurement matrix
         self.C = np.array([[1, 0, 0, 0], [0, 0, 1, 0]])
@@ -45,43 +49,60 @@ class InvertedPendulum:
         self.x_threshold = 2.4
         self.steps_beyond_done = 0
 
-    # Set an initial state
-    def set_state(self, state):
-        assert np.shape(state) == (4, 1)
-        self.state = state
+    # Compute the linearized state space representations from the system parameters
+    def linearize(self):
+
+        # Continuous linearized state space representation
+        self.A_cont = np.array([[0, 1, 0, 0], [0, -self.b_theta, -self.g * self.m / self.M, 0], [0, 0, 0, 1.],
+                                [0, self.b_theta / self.l, (self.m + self.M) * self.g / (self.M * self.l), -self.b_x]])
+        self.B_cont = np.array([[0], [1.0 / self.M], [0], [-1 / (self.M * self.l)]])
 
-    # Computes the real non-linearized dynamics and returns the derivative of the state
-    def dynamics(self, state, u):
-        ds = np.zeros((4, 1))
+        # Discrete linearized state space representation(Eulers method)
+        self.A_disc = np.identity(len(self.state)) + self.A_cont * self.dt
+        self.B_disc = self.dt * self.B_cont
+
+    # Change system parameters, e.g. set_parameters(m=0.6, l=0.45), and recompute the linearizations
+    def set_parameters(self, **params):
+        for name, value in params.items():
+            assert name in ('m', 'M', 'l', 'g', 'b_theta', 'b_x')
+            setattr(self, name, float(value))
+        self.linearize()
+
+    # Set an initial state, a (4,) array or, for compatibility, a (4, 1) column (matrix)
+    def set_state(self, state):
+        assert np.size(state) == 4
+        self.state = np.array(state, dtype=float).reshape(4)
+
+    # Computes the real non-linearized dynamics and returns the derivative of the state, written into 'out' if given
+    def dynamics(self, state, u, out=None):
+        sin_theta = sin(state[2])
+        cos_theta = cos(state[2])
+        ds = np.zeros(4) if out is None else out
         ds[0] = state[1]
-        ds[1] = (u + self.m * self.l * state[3] ** 2 * sin(state[2]) - self.m * self.g * cos(state[2]) *
-                 sin(state[2])) / (self.M + self.m - self.m * cos(state[2]) ** 2) - self.b_x * self.state[1]
+        # Squares as products, rounded like the NumPy squares of InvertedPendulumBatch
+        ds[1] = (u + self.m * self.l * (state[3] * state[3]) * sin_theta - self.m * self.g * cos_theta *
+                 sin_theta) / (self.M + self.m - self.m * (cos_theta * cos_theta)) - self.b_x * state[1]
         ds[2] = state[3]
-        ds[3] = (-cos(state[2]) / self.l) * ds[1] + (self.g / self.l) * sin(state[2]) - self.b_theta * self.state[3]
+        ds[3] = (-cos_theta / self.l) * ds[1] + (self.g / self.l) * sin_theta - self.b_theta * state[3]
         return ds
 
     # Proceed a timestep in simulation by applying discrete dynamics
     def step_disc(self, u):
 
         # Compute the discrete linearized dynamics
-        self.state = self.A_disc * self.state + self.B_disc * u
+        self.state = self.A_disc @ self.state + self.B_disc[:, 0] * u
         self.time_elapsed += self.dt
 
-    # Proceed a timestep in simulation by applying discrete dynamics
-    def step_cont(self, u):
-
-        # Compute the continuous non-linearized dynamics
-        ds = self.dynamics(self.state, u)
+    # Proceed a timestep in simulation by applying continuous dynamics. If the buffer 'out' is given, which may be
+    # self.state itself, the new state is written into it with 'ds' (or self.ds) as derivative buffer, without
+    # allocating arrays
+    def step_cont(self, u, out=None, ds=None):
 
-        # Compute new state via Euler iteration
-        new_state = np.zeros((4, 1))
-        new_state[1] = self.state[1] + ds[1] * self.dt
-        new_state[0] = self.state[0] + new_state[1] * self.dt
-        new_state[3] = self.state[3] + ds[3] * self.dt
-        new_state[2] = self.state[2] + new_state[3] * self.dt
-
-        # Set new state and evolve time
-        self.state = new_state
+        # Integrate the continuous non-linearized dynamics over one time step
+        if out is None:
+            self.state = self.integrator.step(self, self.state, u, self.dt)
+        else:
+            self.state = self.integrator.step_into(self, self.state, u, self.dt, out, self.ds if ds is None else ds)
         self.time_elapsed += self.dt
 
     # Proceed a timestep in simulation and calculating the reward of the action
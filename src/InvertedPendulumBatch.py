@@ -0,0 +1,98 @@
+import numpy as np
+
+
+class InvertedPendulumBatch:
+
+    def __init__(self, n, m=0.5, M=1.0, l=0.5, b_theta=0.5, b_x=1.0):
+
+        # Number of environments
+        self.name = 'Pendulum'
+        self.n = n
+
+        # System parameters, one value per environment
+        self.m = self.per_env(m)  # mass of bob (kg)
+        self.M = self.per_env(M)  # mass of cart (kg)
+        self.l = self.per_env(l)  # length of pendulum (m)
+        self.g = 9.81  # gravitational acceleration (m/s^2)
+        self.b_theta = self.per_env(b_theta)  # damping pendulum (Ns/m)
+        self.b_x = self.per_env(b_x)  # damping cart (Ns/m)
+        self.cart_width = 0.1  # width of the cart (m)
+        self.cart_height = 0.2  # height of the cart (m)
+
+        # Sample time
+        self.control_freq = 100  # frequency at which the used micro controller (Arduino) loops
+        self.dt = 1 / self.control_freq  # time period of one time step
+
+        # State: one row [x, xdot, theta, thetadot] per environment
+        self.state = np.zeros((self.n, 4))
+
+        # Continuous linearized state space representation, one (4, 4) and (4, 1) matrix per environment
+        self.A_cont = np.zeros((self.n, 4, 4))
+        self.A_cont[:, 0, 1] = 1.0
+        self.A_cont[:, 1, 1] = -self.b_theta
+        self.A_cont[:, 1, 2] = -self.g * self.m / self.M
+        self.A_cont[:, 2, 3] = 1.0
+        self.A_cont[:, 3, 1] = self.b_theta / self.l
+        self.A_cont[:, 3, 2] = (self.m + self.M) * self.g / (self.M * self.l)
+        self.A_cont[:, 3, 3] = -self.b_x
+        self.B_cont = np.zeros((self.n, 4, 1))
+        self.B_cont[:, 1, 0] = 1.0 / self.M
+        self.B_cont[:, 3, 0] = -1 / (self.M * self.l)
+
+        # Discrete linearized state space representation(Eulers method)
+        self.A_disc = np.identity(4) + self.A_cont * self.dt
+        self.B_disc = self.dt * self.B_cont
+
+        # Measurement matrix
+        self.C = np.array([[1, 0, 0, 0], [0, 0, 1, 0]])
+
+        # Simulation time
+        self.time_elapsed = 0.0
+
+    # Broadcast a scalar or an array of parameters to one float per environment
+    def per_env(self, value):
+        return np.array(np.broadcast_to(np.asarray(value, dtype=float), (self.n,)))
+
+    # Set the initial states, a single (4,) state is copied to all environments
+    def set_state(self, state):
+        state = np.asarray(state, dtype=float)
+        if state.shape in ((4,), (4, 1)):
+            state = np.tile(np.ravel(state), (self.n, 1))
+        assert np.shape(state) == (self.n, 4)
+        self.state = state
+
+    # Computes the real non-linearized dynamics of all environments and returns the derivatives of the states
+    def dynamics(self, state, u):
+        sin_theta = np.sin(state[:, 2])
+        cos_theta = np.cos(state[:, 2])
+        ds = np.empty_like(state)
+        ds[:, 0] = state[:, 1]
+        ds[:, 1] = (u + self.m * self.l * state[:, 3] ** 2 * sin_theta - self.m * self.g * cos_theta *
+                    sin_theta) / (self.M + self.m - self.m * cos_theta ** 2) - self.b_x * state[:, 1]
+        ds[:, 2] = state[:, 3]
+        ds[:, 3] = (-cos_theta / self.l) * ds[:, 1] + (self.g / self.l) * sin_theta - self.b_theta * state[:, 3]
+        return ds
+
+    # Proceed a timestep in simulation by applying discrete dynamics
+    def step_disc(self, u):
+
+        # Compute the discrete linearized dynamics of all environments
+        self.state = np.einsum('nij,nj->ni', self.A_disc, self.state) + self.B_disc[:, :, 0] * np.reshape(u, (-1, 1))
+        self.time_elapsed += self.dt
+
+    # Proceed a timestep in simulation by applying continuous dynamics
+    def step_cont(self, u):
+
+        # Compute the continuous non-linearized dynamics
+        ds = self.dynamics(self.state, u)
+
+        # Compute new states via Euler iteration
+        new_state = np.empty_like(self.state)
+        new_state[:, 1] = self.state[:, 1] + ds[:, 1] * self.dt
+        new_state[:, 0] = self.state[:, 0] + new_state[:, 1] * self.dt
+        new_state[:, 3] = self.state[:, 3] + ds[:, 3] * self.dt
+        new_state[:, 2] = self.state[:, 2] + new_state[:, 3] * self.dt
+
+        # Set new states and evolve time
+        self.state = new_state
+        self.time_elapsed += self.dt
@@ -0,0 +1,156 @@
+from importlib.util import find_spec
+from math import sin, cos
+
+import numpy as np
+
+from src.Integrators import SemiImplicitEuler
+
+# Rollout kernels of the non-linear dynamics with the semi-implicit Euler integrator, for a batch of B initial states.
+# The input at each step is u = inputs[b, k] - K[b] @ x + r[b], which covers linear state feedback (inputs = 0) as
+# well as precomputed input sequences (K = 0, r = 0). The loop kernels are compiled with Numba when it is installed,
+# otherwise the rollout falls back to NumPy code that is vectorized over the batch. Numba is only imported, and the
+# loops compiled, at the first compiled rollout.
+
+JIT = find_spec('numba') is not None
+
+
+# Pendulum parameter columns: m, M, l, g, b_x, b_theta
+def pendulum_loop(params, x0, K, r, inputs, dt, substeps, states, us):
+    h = dt / substeps
+    for b in range(x0.shape[0]):
+        m, M, l, g, b_x, b_theta = params[b, 0], params[b, 1], params[b, 2], params[b, 3], params[b, 4], params[b, 5]
+        x, xdot, theta, thetadot = x0[b, 0], x0[b, 1], x0[b, 2], x0[b, 3]
+        for k in range(inputs.shape[1]):
+            u = inputs[b, k] - (K[b, 0] * x + K[b, 1] * xdot + K[b, 2] * theta + K[b, 3] * thetadot) + r[b]
+            for _ in range(substeps):
+                sin_theta = sin(theta)
+                cos_theta = cos(theta)
+                xddot = (u + m * l * thetadot ** 2 * sin_theta - m * g * cos_theta * sin_theta) / (
+                        M + m - m * cos_theta ** 2) - b_x * xdot
+                thetaddot = (-cos_theta / l) * xddot + (g / l) * sin_theta - b_theta * thetadot
+                xdot = xdot + xddot * h
+                x = x + xdot * h
+                thetadot = thetadot + thetaddot * h
+                theta = theta + thetadot * h
+            states[b, k, 0] = x
+            states[b, k, 1] = xdot
+            states[b, k, 2] = theta
+            states[b, k, 3] = thetadot
+            us[b, k] = u
+
+
+def pendulum_numpy(params, x0, K, r, inputs, dt, substeps, states, us):
+    h = dt / substeps
+    m, M, l, g, b_x, b_theta = params.T
+    x, xdot, theta, thetadot = np.array(x0.T)
+    for k in range(inputs.shape[1]):
+        u = inputs[:, k] - (K[:, 0] * x + K[:, 1] * xdot + K[:, 2] * theta + K[:, 3] * thetadot) + r
+        for _ in range(substeps):
+            sin_theta = np.sin(theta)
+            cos_theta = np.cos(theta)
+            xddot = (u + m * l * thetadot ** 2 * sin_theta - m * g * cos_theta * sin_theta) / (
+                    M + m - m * cos_theta ** 2) - b_x * xdot
+            thetaddot = (-cos_theta / l) * xddot + (g / l) * sin_theta - b_theta * thetadot
+            xdot = xdot + xddot * h
+            x = x + xdot * h
+            thetadot = thetadot + thetaddot * h
+            theta = theta + thetadot * h
+        states[:, k, 0] = x
+        states[:, k, 1] = xdot
+        states[:, k, 2] = theta
+        states[:, k, 3] = thetadot
+        us[:, k] = u
+
+
+# Robot parameter columns: m, l, g, b_theta
+def robot_loop(params, x0, K, r, inputs, dt, substeps, states, us):
+    h = dt / substeps
+    for b in range(x0.shape[0]):
+        l, g, b_theta = params[b, 1], params[b, 2], params[b, 3]
+        theta, thetadot = x0[b, 0], x0[b, 1]
+        for k in range(inputs.shape[1]):
+            u = inputs[b, k] - (K[b, 0] * theta + K[b, 1] * thetadot) + r[b]
+            for _ in range(substeps):
+                thetaddot = (g / l) * sin(theta) - (u / l) * cos(theta) - b_theta * thetadot
+                thetadot = thetadot + thetaddot * h
+                theta = theta + thetadot * h
+            states[b, k, 0] = theta
+            states[b, k, 1] = thetadot
+            us[b, k] = u
+
+
+def robot_numpy(params, x0, K, r, inputs, dt, substeps, states, us):
+    h = dt / substeps
+    l, g, b_theta = params[:, 1], params[:, 2], params[:, 3]
+    theta, thetadot = np.array(x0.T)
+    for k in range(inputs.shape[1]):
+        u = inputs[:, k] - (K[:, 0] * theta + K[:, 1] * thetadot) + r
+        for _ in range(substeps):
+            thetaddot = (g / l) * np.sin(theta) - (u / l) * np.cos(theta) - b_theta * thetadot
+            thetadot = thetadot + thetaddot * h
+            theta = theta + thetadot * h
+        states[:, k, 0] = theta
+        states[:, k, 1] = thetadot
+        us[:, k] = u
+
+
+# Compiled loop kernels
+compiled = {}
+
+
+def compile_kernel(kernel):
+    if kernel not in compiled:
+        from numba import njit
+        compiled[kernel] = njit(cache=True)(kernel)
+    return compiled[kernel]
+
+
+# Physical parameters of a scalar or a batch model as a (B, p) array
+def parameters(model, B):
+    if model.name == 'Pendulum':
+        names = ['m', 'M', 'l', 'g', 'b_x', 'b_theta']
+    else:
+        names = ['m', 'l', 'g', 'b_theta']
+    return np.stack([np.broadcast_to(np.asarray(getattr(model, name), dtype=float), (B,)) for name in names], axis=1)
+
+
+# Roll out the model from the initial states x0 ((n,) or (B, n)) for the given number of steps, with the gains K
+# ((n,), (1, n) or (B, n)), offsets r (scalar or (B,)) and inputs ((steps,) or (B, steps)). Returns the states
+# after each step (B, steps, n) and the applied inputs (B, steps).
+def rollout_kernel(model, x0, steps, K=None, r=0.0, inputs=None, jit=None):
+
+    # Only the semi-implicit Euler integrator is implemented in the kernels
+    integrator = getattr(model, 'integrator', None)
+    if integrator is not None and type(integrator) is not SemiImplicitEuler:
+        raise ValueError('The rollout kernels only implement the semi-implicit Euler integrator')
+    substeps = 1 if integrator is None else integrator.substeps
+
+    # Broadcast all arguments to the batch
+    x0 = np.atleast_2d(np.asarray(x0, dtype=float))
+    B, n = x0.shape
+    if K is None:
+        K = np.zeros((B, n))
+    else:
+        gains = np.asarray(K, dtype=float).reshape(-1, n)
+        K = np.ascontiguousarray(np.broadcast_to(gains, (B, n)))
+    r = np.ascontiguousarray(np.broadcast_to(np.asarray(r, dtype=float), (B,)))
+    if inputs is None:
+        inputs = np.zeros((B, steps))
+    else:
+        inputs = np.ascontiguousarray(np.broadcast_to(np.asarray(inputs, dtype=float), (B, steps)))
+    params = np.ascontiguousarray(parameters(model, B))
+
+    # Output arrays
+    states = np.empty((B, steps, n))
+    us = np.empty((B, steps))
+
+    # Run the compiled loops or the vectorized NumPy code
+    if jit is None:
+        jit = JIT
+    if model.name == 'Pendulum':
+        kernel = compile_kernel(pendulum_loop) if jit else pendulum_numpy
+    else:
+        kernel = compile_kernel(robot_loop) if jit else robot_numpy
+    kernel(params, np.ascontiguousarray(x0), K, r, inputs, model.dt, substeps, states, us)
+
+    return states, us
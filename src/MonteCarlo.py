@@ -0,0 +1,154 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+import numpy as np
+
+from src.Rollout import rollout
+
+
+# Streaming count, mean, variance, minimum and maximum of a scalar, mergeable across shards (Chan et al.)
+class RunningStats:
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def add(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def merge(self, other):
+        count = self.count + other.count
+        if count == 0:
+            return
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta ** 2 * self.count * other.count / count
+        self.count = count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def std(self):
+        return np.sqrt(self.m2 / self.count) if self.count else np.nan
+
+    def __repr__(self):
+        return 'mean %.4g, std %.4g, min %.4g, max %.4g (%d runs)' % (self.mean, self.std, self.min, self.max,
+                                                                       self.count)
+
+
+# Uniformly distributed initial states and physical parameters, e.g.
+# UniformScenarios([-0.5, 0, -0.2, 0], [0.5, 0, 0.2, 0], m=(0.4, 0.6), l=(0.45, 0.55))
+class UniformScenarios:
+
+    def __init__(self, x0_low, x0_high, **param_ranges):
+        self.x0_low = np.asarray(x0_low, dtype=float)
+        self.x0_high = np.asarray(x0_high, dtype=float)
+        self.param_ranges = param_ranges
+
+    def __call__(self, rng):
+        x0 = rng.uniform(self.x0_low, self.x0_high)
+        params = {name: rng.uniform(low, high) for name, (low, high) in self.param_ranges.items()}
+        return x0, params
+
+
+# Reduced results of a number of runs
+class Results:
+
+    def __init__(self):
+        self.runs = 0
+        self.successes = 0
+        self.settling_time = RunningStats()  # Only over the successful runs
+        self.max_theta = RunningStats()
+        self.effort = RunningStats()
+
+    def merge(self, other):
+        self.runs += other.runs
+        self.successes += other.successes
+        self.settling_time.merge(other.settling_time)
+        self.max_theta.merge(other.max_theta)
+        self.effort.merge(other.effort)
+
+    @property
+    def success_rate(self):
+        return self.successes / self.runs if self.runs else np.nan
+
+    def __repr__(self):
+        return ('runs          %d\nsuccess rate  %.4f\nsettling time %s\nmax |theta|   %s\neffort        %s' %
+                (self.runs, self.success_rate, self.settling_time, self.max_theta, self.effort))
+
+
+# Run the scenarios start ... start+count-1 of one shard and reduce them. Scenario i is drawn from its own random
+# generator seeded with (seed, i), so the results do not depend on the sharding. The controller is designed on the
+# nominal model, after which the parameters of the simulated plant are perturbed.
+def run_shard(model_factory, controller_factory, scenarios, seed, start, count, steps, tolerance, fail_angle):
+
+    results = Results()
+    for i in range(start, start + count):
+        x0, params = scenarios(np.random.default_rng([seed, i]))
+
+        # Nominal design, perturbed plant
+        model = model_factory()
+        controller = controller_factory(model)
+        model.set_parameters(**params)
+        time_axis, states, u_list = rollout(model, controller, x0, steps)
+
+        # Angle of the pendulum (theta is the third state of the pendulum and the first of the robot)
+        theta = np.abs(states[0, :, 2 if model.name == 'Pendulum' else 0])
+        max_theta = np.max(theta)
+
+        # Success when the angle never exceeds fail_angle and ends within the tolerance band, the settling time is
+        # the first time after which the angle stays within the band
+        outside = np.flatnonzero(theta > tolerance)
+        if max_theta < fail_angle and (len(outside) == 0 or outside[-1] < steps - 1):
+            results.successes += 1
+            results.settling_time.add(0.0 if len(outside) == 0 else time_axis[outside[-1] + 1])
+
+        results.runs += 1
+        results.max_theta.add(max_theta)
+        results.effort.add(np.sum(u_list[0] ** 2) * model.dt)
+
+    return results
+
+
+# Run 'runs' closed-loop simulations of controller_factory(model) on model_factory() from the scenarios drawn by
+# scenarios(rng) -> (x0, params), sharded over a pool of worker processes. Only a bounded number of shards is in flight
+# and their results are merged as they complete, so the memory does not grow with the number of runs. The factories
+# and the scenarios must be picklable, e.g. classes or module-level functions.
+def monte_carlo(model_factory, controller_factory, scenarios, runs, steps=1000, tolerance=0.05, fail_angle=np.pi / 2,
+                seed=0, workers=None, shard_size=None):
+
+    workers = os.cpu_count() if workers is None else workers
+    if shard_size is None:
+        shard_size = max(1, min(100, runs // (4 * workers)))
+
+    results = Results()
+
+    # Run in the current process
+    if workers == 1:
+        for start in range(0, runs, shard_size):
+            results.merge(run_shard(model_factory, controller_factory, scenarios, seed, start,
+                                    min(shard_size, runs - start), steps, tolerance, fail_angle))
+        return results
+
+    # Keep at most two shards per worker in flight
+    with ProcessPoolExecutor(workers) as executor:
+        pending = set()
+        for start in range(0, runs, shard_size):
+            if len(pending) >= 2 * workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    results.merge(future.result())
+            pending.add(executor.submit(run_shard, model_factory, controller_factory, scenarios, seed, start,
+                                        min(shard_size, runs - start), steps, tolerance, fail_angle))
+        for future in pending:
+            results.merge(future.result())
+
+    return results
@@ -0,0 +1,101 @@
+import json
+
+# Per-phase timing of the control loop (control, integration, recording, drawing and the whole tick), measured with
+# perf_counter_ns by the engine and the Simulator when a profiler is passed to them. The durations are aggregated in
+# HDR-style histograms with a fixed relative precision, so the memory does not grow with the number of ticks.
+
+
+# Log-linear histogram of nanosecond durations: values below 2^precision are counted exactly, above that every power
+# of two is split into 2^precision buckets, i.e. a relative error below 2^-precision
+class Histogram:
+
+    def __init__(self, precision=7, max_exponent=40):
+        self.precision = precision
+        self.sub_buckets = 2 ** precision
+        self.counts = [0] * ((max_exponent - precision + 1) * self.sub_buckets)
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def index(self, value):
+        if value < self.sub_buckets:
+            return value
+        shift = value.bit_length() - self.precision - 1
+        return min(shift * self.sub_buckets + (value >> shift), len(self.counts) - 1)
+
+    # Lowest value of a bucket
+    def value(self, index):
+        if index < 2 * self.sub_buckets:
+            return index
+        shift = index // self.sub_buckets - 1
+        return (index - shift * self.sub_buckets) << shift
+
+    def record(self, value):
+        self.counts[self.index(value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, p):
+        if self.count == 0:
+            return 0
+        rank = p / 100 * self.count
+        cumulative = 0
+        for index, count in enumerate(self.counts):
+            cumulative += count
+            if count and cumulative >= rank:
+                return min(self.value(index), self.max)
+        return self.max
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+
+class Profiler:
+
+    def __init__(self, deadline=None):
+
+        # Deadline of a tick (s), model.dt of the engine if None
+        self.deadline = deadline
+
+        # Histograms and deadline misses per phase
+        self.histograms = {}
+        self.misses = {}
+
+    # Record a duration (ns) of a phase, counted as a miss when it exceeds the deadline (ns)
+    def add(self, phase, duration, deadline=None):
+        histogram = self.histograms.get(phase)
+        if histogram is None:
+            histogram = self.histograms[phase] = Histogram()
+            self.misses[phase] = 0
+        histogram.record(duration)
+        if deadline is not None and duration > deadline:
+            self.misses[phase] += 1
+
+    # Statistics of all phases in microseconds, with the non-empty buckets (lowest value in ns, count) for dashboards
+    def summary(self, buckets=False):
+        summary = {}
+        for phase, histogram in self.histograms.items():
+            summary[phase] = {'count': histogram.count, 'mean_us': histogram.mean / 1e3,
+                              'p50_us': histogram.percentile(50) / 1e3, 'p99_us': histogram.percentile(99) / 1e3,
+                              'p999_us': histogram.percentile(99.9) / 1e3, 'max_us': histogram.max / 1e3,
+                              'deadline_misses': self.misses[phase]}
+            if buckets:
+                summary[phase]['buckets'] = [[histogram.value(index), count]
+                                             for index, count in enumerate(histogram.counts) if count]
+        return summary
+
+    def save(self, path):
+        with open(path, 'w') as f:
+            json.dump({'deadline': self.deadline, 'phases': self.summary(buckets=True)}, f, indent=1)
+
+    def report(self):
+        lines = ['%-12s %10s %10s %10s %10s %10s %8s' % ('Phase', 'Count', 'Mean (us)', 'p50 (us)', 'p99 (us)',
+                                                           'Max (us)', 'Misses')]
+        for phase, s in self.summary().items():
+            lines.append('%-12s %10d %10.2f %10.2f %10.2f %10.2f %8d' % (phase, s['count'], s['mean_us'], s['p50_us'],
+                                                                         s['p99_us'], s['max_us'],
+                                                                         s['deadline_misses']))
+        return '\n'.join(lines)
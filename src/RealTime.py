@@ -0,0 +1,128 @@
+import sys
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from time import perf_counter_ns, sleep
+
+import numpy as np
+
+from src.Engine import tick
+from src.Profiler import Profiler
+from src.Recorder import Recorder
+
+# Real-time execution of the closed loop at the control period model.dt (1 / control_freq of the micro controller),
+# to check whether a controller fits in that budget. Every tick starts at a fixed time on the wall clock and the
+# controller runs in a worker thread. When it does not return within the budget, the tick is an overrun and the
+# policy decides the input of this period:
+#
+# - 'hold': the last input is held
+# - 'skip': the input is zero
+# - 'fallback': the input of a cheap fallback controller, by default the LQR controller of the model
+#
+# A call that overruns keeps the worker busy and its late result is discarded, so the following ticks overrun as well
+# until it returns. The plant advances one period per tick, as the engine does.
+policies = ('hold', 'skip', 'fallback')
+
+
+# Control signal and latency (ns) of a control call, run in the worker thread
+def timed_control(controller, state):
+    start = perf_counter_ns()
+    u = np.asarray(controller.control(state)).item()
+    return u, perf_counter_ns() - start
+
+
+class RealTimeResults:
+
+    def __init__(self, period, budget, policy, overruns, late, profiler):
+        self.period = period
+        self.budget = budget
+        self.policy = policy
+        self.overruns = overruns  # Boolean per tick, True if the policy set the input
+        self.late = late  # Number of discarded late results
+        self.profiler = profiler
+
+    # Jitter of the tick start times, latency of the control calls and duration of the ticks (see Profiler.py)
+    def summary(self):
+        return self.profiler.summary()
+
+    def __repr__(self):
+        return ('period %.2f ms, control budget %.2f ms, policy %s\noverruns %d/%d (%.1f %%), late results %d\n%s' %
+                (self.period / 1e6, self.budget / 1e6, self.policy, self.overruns.sum(), len(self.overruns),
+                 100 * self.overruns.mean() if len(self.overruns) else 0.0, self.late, self.profiler.report()))
+
+
+# Runs the closed loop in real time for 'steps' ticks of model.dt. The controller has to return within model.dt /
+# slowdown, so a slowdown > 1 emulates a target that is that many times slower than this machine. Returns the time
+# axis, states and inputs like Engine.run and the RealTimeResults.
+def run_realtime(model, controller, steps=1000, policy='hold', fallback=None, slowdown=1.0, recorder=None):
+    if policy not in policies:
+        raise ValueError('Unknown overrun policy %r, expected one of %s' % (policy, policies))
+
+    # Fallback controller tracking the same desired position
+    if policy == 'fallback' and fallback is None:
+        from src.controllers.LQRController import Control
+        fallback = Control(model)
+        fallback.set_desired_position(getattr(controller, 'xd', 0.0))
+
+    # Preallocate a buffer of all steps
+    if recorder is None:
+        recorder = Recorder(len(model.state), capacity=steps)
+    overruns = np.zeros(steps, dtype=bool)
+    late = 0
+
+    # Period and control budget (ns). Ticks that start more than a period late are counted as deadline misses of
+    # the jitter.
+    period = int(1e9 * model.dt)
+    budget = int(period / slowdown)
+    profiler = Profiler(model.dt)
+
+    # A short switch interval of the interpreter, so that the loop thread wakes up in time while the controller
+    # holds the GIL
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-4)
+    executor = ThreadPoolExecutor(1)
+    pending = None
+    u = 0.0
+    try:
+        start = perf_counter_ns()
+        for i in range(steps):
+
+            # Wait for the start of the tick
+            scheduled = start + i * period
+            now = perf_counter_ns()
+            if now < scheduled:
+                sleep((scheduled - now) / 1e9)
+            started = perf_counter_ns()
+            profiler.add('jitter', max(started - scheduled, 0), period)
+
+            # Late result of a previous tick
+            if pending is not None and pending.done():
+                profiler.add('control', pending.result()[1], budget)
+                pending = None
+                late += 1
+
+            # Compute control signal within the remaining budget, if the worker is free
+            if pending is None:
+                future = executor.submit(timed_control, controller, model.state.copy())
+                try:
+                    u, latency = future.result(timeout=max(budget - (perf_counter_ns() - started), 0) / 1e9)
+                    profiler.add('control', latency, budget)
+                except TimeoutError:
+                    pending = future
+                    overruns[i] = True
+            else:
+                overruns[i] = True
+
+            # Overrun policy, 'hold' keeps u
+            if overruns[i]:
+                if policy == 'skip':
+                    u = 0.0
+                elif policy == 'fallback':
+                    u = np.asarray(fallback.control(model.state)).item()
+
+            # Apply dynamics and capture data, the tick is timed from its start
+            tick(model, None, i, recorder, profiler, u=u, start=started)
+    finally:
+        executor.shutdown(wait=True)
+        sys.setswitchinterval(switch_interval)
+
+    recorder.flush()
+    return recorder.recent() + (RealTimeResults(period, budget, policy, overruns, late, profiler),)
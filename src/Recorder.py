@@ -0,0 +1,88 @@
+import struct
+
+import numpy as np
+
+# Fixed size of the .npy header, so that it can be rewritten in place with the final number of rows
+header_size = 128
+
+
+def npy_header(shape):
+    header = "{'descr': '<f8', 'fortran_order': False, 'shape': %s, }" % repr(tuple(shape))
+    header = header.ljust(header_size - 11) + '\n'
+    return b'\x93NUMPY\x01\x00' + struct.pack('<H', len(header)) + header.encode('latin1')
+
+
+# Records rows [t, state, u] into a preallocated ring buffer that holds the last 'capacity' samples, e.g. for a live
+# view. If a path is given, the samples are also flushed in chunks of 'chunk' rows to a (samples, n + 2) float64 .npy
+# file, so the memory stays fixed however long the simulation runs. The header is updated after each flush, so the
+# file can be opened with load_recording during the run as well.
+class Recorder:
+
+    def __init__(self, n, capacity=10000, path=None, chunk=None):
+
+        # Ring buffer
+        self.n = n
+        self.capacity = capacity
+        self.buffer = np.zeros((capacity, n + 2))
+        self.count = 0
+
+        # Chunked output file
+        self.chunk = capacity if chunk is None else chunk
+        assert self.chunk <= capacity
+        self.path = path
+        self.flushed = 0
+        self.file = None
+        if path is not None:
+            self.file = open(path, 'wb')
+            self.file.write(npy_header((0, n + 2)))
+
+    def record(self, t, state, u):
+        row = self.buffer[self.count % self.capacity]
+        row[0] = t
+        row[1:-1] = state
+        row[-1] = u
+        self.count += 1
+        if self.file is not None and self.count - self.flushed == self.chunk:
+            self.flush()
+
+    # Write the rows that are not yet in the file and update the header
+    def flush(self):
+        if self.file is None or self.flushed == self.count:
+            return
+        start = self.flushed % self.capacity
+        stop = start + self.count - self.flushed
+        self.file.write(self.buffer[start:min(stop, self.capacity)].tobytes())
+        if stop > self.capacity:
+            self.file.write(self.buffer[:stop - self.capacity].tobytes())
+        self.flushed = self.count
+        self.file.seek(0)
+        self.file.write(npy_header((self.count, self.n + 2)))
+        self.file.seek(0, 2)
+        self.file.flush()
+
+    def close(self):
+        self.flush()
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # The samples still in the ring buffer, oldest first, as time axis, states and inputs
+    def recent(self):
+        if self.count <= self.capacity:
+            rows = self.buffer[:self.count].copy()
+        else:
+            split = self.count % self.capacity
+            rows = np.concatenate((self.buffer[split:], self.buffer[:split]))
+        return rows[:, 0], rows[:, 1:-1], rows[:, -1]
+
+
+# Memory-map a recording and return views of its time axis, states and inputs
+def load_recording(path):
+    rows = np.load(path, mmap_mode='r')
+    return rows[:, 0], rows[:, 1:-1], rows[:, -1]
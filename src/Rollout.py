@@ -0,0 +1,34 @@
+import numpy as np
+
+from src.Engine import run
+from src.Integrators import SemiImplicitEuler
+from src.Kernels import rollout_kernel
+
+
+# Runs the closed loop from a batch of initial states x0s ((n,) or (B, n)) and returns the time axis, the states
+# (B, steps, n) and the control inputs (B, steps). Controllers with linear state feedback (a 'linear_feedback' method
+# returning K and r of u = -K x + r) are fused into one rollout kernel, other controllers are stepped by the engine.
+# The kernels only implement the semi-implicit Euler integrator, models with other integrators are stepped by the
+# engine as well.
+def rollout(model, controller=None, x0s=None, steps=1000, jit=None):
+
+    time_axis = np.arange(steps) * model.dt
+    x0s = np.atleast_2d(np.asarray(model.state if x0s is None else x0s, dtype=float))
+
+    # Fused kernel for open loop and linear state feedback
+    if type(getattr(model, 'integrator', None)) in (SemiImplicitEuler, type(None)):
+        if controller is None:
+            states, u_list = rollout_kernel(model, x0s, steps, jit=jit)
+            return time_axis, states, u_list
+        if hasattr(controller, 'linear_feedback'):
+            K, r = controller.linear_feedback()
+            states, u_list = rollout_kernel(model, x0s, steps, K=K, r=r, jit=jit)
+            return time_axis, states, u_list
+
+    # Other controllers and integrators, one initial state at a time
+    states = np.empty((len(x0s), steps, x0s.shape[1]))
+    u_list = np.empty((len(x0s), steps))
+    for b, x0 in enumerate(x0s):
+        model.set_state(x0)
+        _, states[b], u_list[b] = run(model, controller, steps)
+    return time_axis, states, u_list
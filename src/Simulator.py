@@ -1,15 +1,15 @@
-import matplotlib
-import time
-matplotlib.use('TKAgg')
-import matplotlib.pyplot as plt
-import matplotlib.animation as animation
-from matplotlib.patches import Rectangle
 import numpy as np
+from time import perf_counter, perf_counter_ns
+
+from src.Engine import run, tick
+from src.Trajectory import load_trajectory, save_trajectory
+
+# matplotlib is only imported when a figure is set up, so that headless runs (simulate(animate=False)) do not load it
 
 
 class Simulator:
     
-    def __init__(self, model, control=None, frames=1000):
+    def __init__(self, model, control=None, frames=1000, recorder=None, profiler=None):
         
         # Model
         self.model = model
@@ -24,12 +24,32 @@ class Simulator:
         self.model.dt = self.delta_t
         self.sim_time = self.frames * self.delta_t
         
-        # Data lists
-        self.time_axis = []  # Time axis
-        self.u_list = []  # Total joint torques
-        
-        # Set up figure and animation
-        self.fig = plt.figure()
+        # Optional recorder of long runs, only the samples in its ring buffer are replayed
+        self.recorder = recorder
+
+        # Optional profiler (Profiler.py) of the physics steps and the drawing
+        self.profiler = profiler
+
+        # Recorded data arrays
+        self.time_axis = np.empty(0)  # Time axis
+        self.state_list = np.empty((0, len(self.model.state)))  # States
+        self.u_list = np.empty(0)  # Total joint torques
+
+        # Replay at the speed of the wall clock
+        self.interval = 1000 * self.delta_t
+
+    # Set up figure and animation, offscreen figures are rendered by Agg without any GUI backend
+    def setup_figure(self, offscreen=False):
+        import matplotlib.pyplot as plt
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+        from matplotlib.patches import Rectangle
+
+        if offscreen:
+            self.fig = Figure()
+            FigureCanvasAgg(self.fig)
+        else:
+            self.fig = plt.figure()
         
         # Plot axis
         ax1 = self.fig.add_subplot(211, autoscale_on=False, xlim=(-2.5, 2.5), ylim=(-1.0, 1.0))
@@ -44,20 +64,12 @@ class Simulator:
 
         # Control axis
         ax4 = self.fig.add_subplot(212, autoscale_on=False, xlim=(0, self.sim_time), ylim=(-20, 20))
+        self.u_axis = ax4
         self.u_plot, = ax4.plot([], [], '-', lw=1, )
         ax4.set_title("Control commands")
         ax4.set_xlabel("Time (s)")
         ax4.set_ylabel("Control signal (m/s)")
         ax4.grid()
-        
-        # State lists
-        self.state_list = []
-
-        # Choose the interval based on dt and the time to animate one step
-        t0 = time.time()
-        self.model.step_cont(0)  # Modulate one simulation step
-        t1 = time.time()
-        self.interval = 1000 * self.delta_t - (t1 - t0)
     
     # Initialize animation
     def init(self):
@@ -71,63 +83,165 @@ class Simulator:
         self.u_plot.set_data([], [])
         return self.pendulum_plot, self.xd_plot, self.u_plot, self.time_plot, self.cart_plot
     
-    # Animation step
-    def animate(self, i):
-    
-        # Compute control signal
-        if self.control:
-            u = self.control.control(self.model.state)
-        else:
-            u = 0
-    
-        # Apply dynamics
-        self.model.step_cont(u)
-        
-        # Capture state data
-        self.state_list.append(self.model.state)
-        
+    # Draw the pendulum (and cart) of a state
+    def draw(self, state):
+
         # Compute pendulum mass position
         if self.model.name == "Pendulum":
-            x_pos_pend = self.model.l * np.sin(self.model.state[2]) + self.model.state[0]
-            y_pos_pend = self.model.l * np.cos(self.model.state[2])
-            thisx = [self.model.state[0], x_pos_pend]
+            x_pos_pend = self.model.l * np.sin(state[2]) + state[0]
+            y_pos_pend = self.model.l * np.cos(state[2])
+            thisx = [state[0], x_pos_pend]
             thisy = [0, y_pos_pend]
         else:
-            x_pos_pend = self.model.l * np.sin(self.model.state[0])
-            y_pos_pend = self.model.l * np.cos(self.model.state[0])
+            x_pos_pend = self.model.l * np.sin(state[0])
+            y_pos_pend = self.model.l * np.cos(state[0])
             thisx = [0, x_pos_pend]
             thisy = [0, y_pos_pend]
 
         # Plot pendulum
         self.pendulum_plot.set_data(thisx, thisy)
 
-        # Plot time
-        self.time_plot.set_text('time = %.1fs' % (i * self.delta_t))
-
         # Plot cart
         if self.model.name == 'Pendulum':
-            self.cart_plot.set_x(self.model.state[0] - self.model.cart_width / 2)
+            self.cart_plot.set_x(state[0] - self.model.cart_width / 2)
 
         # Plot desired position
         if self.control:
-            self.xd_plot.set_data(self.control.xd, 0)
-    
-        # Update plot data
-        self.time_axis.append(i * self.delta_t)
-        self.u_list.append(u)
-    
+            self.xd_plot.set_data([self.control.xd], [0])
+
+    # Animation step, replays the recorded data
+    def animate(self, i):
+        if self.profiler is not None:
+            start = perf_counter_ns()
+
+        # Recorded state
+        self.draw(self.state_list[i])
+
+        # Plot time
+        self.time_plot.set_text('time = %.1fs' % self.time_axis[i])
+
         # Plot data lists
-        self.u_plot.set_data(self.time_axis, self.u_list)
-    
+        self.u_plot.set_data(self.time_axis[:i + 1], self.u_list[:i + 1])
+
+        if self.profiler is not None:
+            self.profiler.add('drawing', perf_counter_ns() - start)
         return self.pendulum_plot, self.xd_plot, self.u_plot, self.time_plot, self.cart_plot
 
-    def simulate(self):
-    
+    # Live animation step, advances the simulation by steps_per_frame physics steps
+    def animate_live(self, i):
+
+        # Measured frame time, smoothed
+        now = perf_counter()
+        frame_time = now - self.last_frame
+        self.last_frame = now
+        self.frame_time = frame_time if self.frame_time is None else 0.9 * self.frame_time + 0.1 * frame_time
+
+        # Physics steps of this frame, adapted to the frame time to keep up with the wall clock if not fixed
+        steps = self.steps_per_frame
+        if steps is None:
+            steps = int(min(max(1, round(self.frame_time / self.delta_t)), self.max_steps_per_frame))
+        u = 0.0
+        profiler = self.profiler
+        for _ in range(steps):
+            u = tick(self.model, self.control, self.step_index, self.recorder, profiler)
+            self.step_index += 1
+        if profiler is not None:
+            start = perf_counter_ns()
+
+        # Decimated control history, one sample per frame
+        self.t_history[:-1] = self.t_history[1:]
+        self.u_history[:-1] = self.u_history[1:]
+        self.t_history[-1] = self.model.time_elapsed
+        self.u_history[-1] = u
+
+        # Plot state, time and the history relative to the current time
+        self.draw(self.model.state)
+        self.time_plot.set_text('time = %.1fs, %d steps/frame, %.1f ms/frame' % (self.model.time_elapsed, steps,
+                                                                                 1000 * self.frame_time))
+        self.u_plot.set_data(self.t_history - self.model.time_elapsed, self.u_history)
+
+        # Drawing of the artists and the time since the last frame (including the rendering by matplotlib), which
+        # misses its deadline when it is longer than the frame interval
+        if profiler is not None:
+            profiler.add('drawing', perf_counter_ns() - start)
+            profiler.add('frame', int(1e9 * frame_time), self.frame_deadline)
+
+        return self.pendulum_plot, self.xd_plot, self.u_plot, self.time_plot, self.cart_plot
+
+    # Replay recorded data in an animation
+    def replay(self):
+        import matplotlib.animation as animation
+        import matplotlib.pyplot as plt
+
+        self.setup_figure()
+
+        # Animate
+        _ = animation.FuncAnimation(self.fig, self.animate, repeat=False, interval=self.interval,
+                                    frames=len(self.time_axis), blit=True, init_func=self.init)
+
+        plt.tight_layout()
+        plt.show()
+
+    # Simulate while rendering, until the window is closed. Each frame advances the model by steps_per_frame physics
+    # steps, rendered at the wall clock speed, or, if None, by as many steps as the measured frame time takes (at most
+    # max_steps_per_frame). The control plot shows a fixed-length history with one sample per frame, so the cost of a
+    # frame does not grow with the simulated time.
+    def live(self, steps_per_frame=None, history=500, fps=30, max_steps_per_frame=100):
+        import matplotlib.animation as animation
+        import matplotlib.pyplot as plt
+
+        self.setup_figure()
+        self.steps_per_frame = steps_per_frame
+        self.max_steps_per_frame = max_steps_per_frame
+
+        # Control history, NaN until filled
+        self.t_history = np.full(history, np.nan)
+        self.u_history = np.full(history, np.nan)
+        window = history * (steps_per_frame * self.delta_t if steps_per_frame else 1.0 / fps)
+        self.u_axis.set_xlim(-window, 0)
+        self.u_axis.set_xlabel("Time relative to now (s)")
+
+        # Frame timing
+        self.frame_time = None
+        self.last_frame = perf_counter()
+
+        # Index of the next physics step, the recorded samples are stamped with index * dt like in the engine
+        self.step_index = 0
+        interval = 1000 * steps_per_frame * self.delta_t if steps_per_frame else 1000 / fps
+        self.frame_deadline = int(1e6 * interval)
+
         # Animate
-        _ = animation.FuncAnimation(self.fig, self.animate, repeat=False, interval=self.interval, frames=self.frames,
-                                        blit=True, init_func=self.init)
+        _ = animation.FuncAnimation(self.fig, self.animate_live, interval=interval, blit=True, init_func=self.init,
+                                    cache_frame_data=False)
 
         plt.tight_layout()
         plt.show()
+        if self.recorder is not None:
+            self.recorder.flush()
+
+    # Export the recorded data as MP4 (ffmpeg) or GIF (Pillow) video, see VideoExport.py
+    def export(self, path, fps=30, workers=1, dpi=100):
+        from src.VideoExport import export_video
+        export_video(self, path, fps, workers, dpi)
+
+    # Save the recorded data as trajectory file (Trajectory.py)
+    def save(self, path):
+        save_trajectory(path, self.time_axis, self.state_list, self.u_list, self.model, self.control)
+
+    # Load recorded data from a trajectory file of the same model, e.g. to replay it
+    def load(self, path):
+        header, self.time_axis, self.state_list, self.u_list = load_trajectory(path)
+        assert header['model'] == self.model.name
+        return header
+
+    def simulate(self, animate=True):
+
+        # Run the closed loop headless
+        self.time_axis, self.state_list, self.u_list = run(self.model, self.control, self.frames, self.recorder,
+                                                         self.profiler)
+
+        # Replay
+        if animate:
+            self.replay()
         
-        return self.time_axis, np.array(self.state_list)
\ No newline at end of file
+        return self.time_axis, self.state_list
@@ -0,0 +1,96 @@
+import hashlib
+import os
+from collections import OrderedDict
+
+import numpy as np
+
+
+# Memoization of the controller synthesis (Riccati solutions, placed gains, prediction and condensed QP matrices).
+# Results are tuples of arrays, keyed by a hash of the kind of synthesis and all its inputs (A, B, Q, R, P, N, poles).
+# They are kept in an in-memory LRU, bounded by the number of entries and the total size, and optionally in a directory
+# of .npz files that is shared between script runs. The cached arrays are shared, so they are made read-only.
+class SynthesisCache:
+
+    def __init__(self, size=1024, max_bytes=512 * 2 ** 20, directory=None):
+
+        # In-memory LRU
+        self.entries = OrderedDict()
+        self.size = size
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+
+        # Optional on-disk store
+        self.directory = directory
+
+        # Counters
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    # Hash of the kind of synthesis and its inputs, integer inputs are hashed as floats so that e.g. integer and float
+    # weight matrices share an entry
+    @staticmethod
+    def key(kind, inputs):
+        h = hashlib.blake2b(kind.encode(), digest_size=20)
+        for value in inputs:
+            value = np.asarray(value)
+            if value.dtype.kind in 'biu':
+                value = value.astype(float)
+            h.update(str((value.dtype.str, value.shape)).encode())
+            h.update(np.ascontiguousarray(value).tobytes())
+        return kind + '-' + h.hexdigest()
+
+    # Return the cached result of compute() for the given inputs, compute() returns a tuple of arrays
+    def get(self, kind, inputs, compute):
+        key = self.key(kind, inputs)
+
+        # In memory
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return self.entries[key]
+
+        # On disk
+        path = None if self.directory is None else os.path.join(self.directory, key + '.npz')
+        if path is not None and os.path.exists(path):
+            with np.load(path) as data:
+                result = tuple(data['arr_%d' % i] for i in range(len(data.files)))
+            self.disk_hits += 1
+        else:
+            result = tuple(np.asarray(value) for value in compute())
+            self.misses += 1
+            if path is not None:
+                os.makedirs(self.directory, exist_ok=True)
+                tmp = path + '.%d.tmp' % os.getpid()
+                with open(tmp, 'wb') as f:
+                    np.savez(f, *result)
+                os.replace(tmp, path)
+
+        for value in result:
+            value.setflags(write=False)
+        self.insert(key, result)
+        return result
+
+    def insert(self, key, result):
+        nbytes = sum(value.nbytes for value in result)
+        if nbytes > self.max_bytes:
+            return
+        self.entries[key] = result
+        self.nbytes += nbytes
+        while len(self.entries) > self.size or self.nbytes > self.max_bytes:
+            _, evicted = self.entries.popitem(last=False)
+            self.nbytes -= sum(value.nbytes for value in evicted)
+
+    # Empty the in-memory LRU and reset the counters, the on-disk store is kept
+    def clear(self):
+        self.entries.clear()
+        self.nbytes = 0
+        self.hits = self.disk_hits = self.misses = 0
+
+    def __repr__(self):
+        return 'SynthesisCache: %d hits, %d disk hits, %d misses, %d entries (%.1f MB)' % (
+            self.hits, self.disk_hits, self.misses, len(self.entries), self.nbytes / 2 ** 20)
+
+
+# Cache shared by all controllers, set synthesis_cache.directory to a path to enable the on-disk store
+synthesis_cache = SynthesisCache()
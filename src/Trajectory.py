@@ -0,0 +1,77 @@
+import glob
+import json
+import struct
+
+import numpy as np
+
+# Trajectory file (.traj): the magic b'TRAJ', the format version and the header length as two little-endian uint32,
+# a JSON header and the contiguous little-endian float64 blocks of the time axis (steps,), the states (steps, n) and
+# the inputs (steps,). Every block starts at a multiple of 64 bytes and its offset is stored in the header, so the
+# columns are opened with np.memmap without copying or parsing the data.
+magic = b'TRAJ'
+version = 1
+alignment = 64
+
+
+def aligned(offset):
+    return -(-offset // alignment) * alignment
+
+
+# Parameters of the model and tuning of the controller stored in the header
+def describe(model, controller):
+    header = {'model': model.name, 'dt': model.dt,
+              'parameters': {name: getattr(model, name) for name in ('m', 'M', 'l', 'g', 'b_theta', 'b_x')
+                             if hasattr(model, name)}}
+    if controller is not None:
+        header['controller'] = type(controller).__module__.split('.')[-1]
+        header['gains'] = {name: np.asarray(getattr(controller, name)).tolist()
+                           for name in ('K', 'Kr', 'gain', 'Kp_th', 'Kd_th', 'Kp_x', 'Kd_x', 'xd', 'Q', 'R', 'P', 'N')
+                           if hasattr(controller, name)}
+    return header
+
+
+def save_trajectory(path, time_axis, state_list, u_list, model, controller=None):
+    time_axis = np.asarray(time_axis, dtype='<f8')
+    state_list = np.asarray(state_list, dtype='<f8')
+    u_list = np.asarray(u_list, dtype='<f8')
+    steps, n = state_list.shape
+
+    # Block offsets after the header, the header is sized with 64 bytes of room for the digits of the offsets
+    header = describe(model, controller)
+    header.update({'steps': steps, 'n': n, 'dtype': '<f8', 'offsets': {'time': 0, 'state': 0, 'input': 0}})
+    size = len(json.dumps(header).encode()) + 64
+    start = aligned(12 + size)
+    header['offsets'] = {'time': start, 'state': aligned(start + 8 * steps),
+                         'input': aligned(aligned(start + 8 * steps) + 8 * steps * n)}
+    data = json.dumps(header).encode().ljust(start - 12)
+
+    with open(path, 'wb') as f:
+        f.write(magic + struct.pack('<II', version, len(data)) + data)
+        for name, block in (('time', time_axis), ('state', state_list), ('input', u_list)):
+            f.seek(header['offsets'][name])
+            f.write(block.tobytes())
+
+
+def load_header(path):
+    with open(path, 'rb') as f:
+        assert f.read(4) == magic, 'Not a trajectory file'
+        file_version, length = struct.unpack('<II', f.read(8))
+        assert file_version == version
+        return json.loads(f.read(length))
+
+
+# Open a trajectory file, the time axis, states and inputs are read-only memory maps
+def load_trajectory(path):
+    header = load_header(path)
+    steps, n, offsets = header['steps'], header['n'], header['offsets']
+    if steps == 0:
+        return header, np.empty(0), np.empty((0, n)), np.empty(0)
+    time_axis = np.memmap(path, dtype=header['dtype'], mode='r', offset=offsets['time'], shape=(steps,))
+    state_list = np.memmap(path, dtype=header['dtype'], mode='r', offset=offsets['state'], shape=(steps, n))
+    u_list = np.memmap(path, dtype=header['dtype'], mode='r', offset=offsets['input'], shape=(steps,))
+    return header, time_axis, state_list, u_list
+
+
+# Open all trajectory files matching a glob pattern, sorted by path
+def load_trajectories(pattern):
+    return [load_trajectory(path) for path in sorted(glob.glob(pattern))]
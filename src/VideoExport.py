@@ -0,0 +1,175 @@
+import copy
+import os
+import shutil
+import subprocess
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from types import SimpleNamespace
+
+import numpy as np
+
+# Offscreen export of recorded simulations to MP4 (piped as raw frames to ffmpeg) or GIF (Pillow). The figure of the
+# Simulator is rendered by Agg without any GUI backend. Its static parts are drawn once and every frame only updates
+# and redraws the animated artists on top of that background (blitting). Frame ranges can be rendered by parallel
+# worker processes, whose segments are concatenated afterwards.
+
+
+# Render the frames of the given sample indexes, yielding the RGBA buffer of each frame
+def render_frames(sim, indexes, dpi):
+
+    # Offscreen figure, the animated artists are excluded from the background
+    sim.setup_figure(offscreen=True)
+    sim.fig.set_dpi(dpi)
+    sim.fig.tight_layout()
+    sim.u_axis.set_xlim(sim.time_axis[0], max(sim.time_axis[-1], sim.time_axis[0] + sim.delta_t))
+    artists = sim.init()
+    for artist in artists:
+        artist.set_animated(True)
+    canvas = sim.fig.canvas
+    canvas.draw()
+    background = canvas.copy_from_bbox(sim.fig.bbox)
+
+    for i in indexes:
+        canvas.restore_region(background)
+        for artist in sim.animate(i):
+            artist.axes.draw_artist(artist)
+        yield canvas.buffer_rgba()
+
+
+# GIF palette (a list of RGB values) of the first frame. Quantizing all frames to one fixed palette without dithering
+# is much faster than an adaptive palette per frame.
+def gif_palette(sim, dpi):
+    from PIL import Image
+    frame = next(render_frames(sim, [0], dpi))
+    return Image.fromarray(np.array(frame)[:, :, :3]).quantize(256).getpalette()
+
+
+# Nearest palette color quantizer with a lookup table over all 2^24 RGB colors that is filled on demand. The figures
+# have few distinct colors, so after the first frame quantizing is mostly a table lookup per pixel.
+class Quantizer:
+
+    def __init__(self, palette):
+        self.palette = np.array(palette, dtype=float).reshape(-1, 3)
+        self.table = np.zeros(2 ** 24, dtype=np.uint8)
+        self.known = np.zeros(2 ** 24, dtype=bool)
+
+    def __call__(self, rgb):
+        rgb = np.asarray(rgb)
+        packed = (rgb[..., 0].astype(np.int32) << 16) | (rgb[..., 1].astype(np.int32) << 8) | rgb[..., 2]
+
+        # Nearest palette colors of the colors not seen before
+        new = np.unique(packed[~self.known[packed]])
+        if len(new):
+            colors = np.stack([(new >> 16) & 255, (new >> 8) & 255, new & 255], axis=1)
+            self.table[new] = np.argmin(((colors[:, None, :] - self.palette[None]) ** 2).sum(axis=2), axis=1)
+            self.known[new] = True
+
+        return self.table[packed]
+
+
+# Render the frames and quantize them to the palette, yielding the (height, width) uint8 palette indexes of each frame
+def quantized_frames(sim, indexes, dpi, palette):
+    quantizer = Quantizer(palette)
+    for frame in render_frames(sim, indexes, dpi):
+        yield quantizer(np.asarray(frame)[:, :, :3])
+
+
+# Write palette-index frames as GIF, appended one by one by Pillow
+def write_gif(path, frames, fps, palette):
+    from PIL import Image
+
+    def images():
+        for frame in frames:
+            image = Image.fromarray(np.asarray(frame), 'P')
+            image.putpalette(palette)
+            yield image
+    sequence = images()
+    first = next(sequence)
+    first.save(path, save_all=True, append_images=sequence, duration=1000 / fps, loop=0, optimize=False)
+
+
+# Pipe raw RGBA frames to ffmpeg
+def write_ffmpeg(path, frames, fps):
+    frame = next(frames)
+    height, width = np.asarray(frame).shape[:2]
+    command = ['ffmpeg', '-y', '-loglevel', 'error', '-f', 'rawvideo', '-pix_fmt', 'rgba',
+               '-s', '%dx%d' % (width, height), '-r', str(fps), '-i', '-', '-vf', 'pad=ceil(iw/2)*2:ceil(ih/2)*2',
+               '-pix_fmt', 'yuv420p', path]
+    process = subprocess.Popen(command, stdin=subprocess.PIPE)
+    process.stdin.write(frame)
+    for frame in frames:
+        process.stdin.write(frame)
+    process.stdin.close()
+    if process.wait() != 0:
+        raise RuntimeError('ffmpeg failed to write %s' % path)
+
+
+# Render one segment in a worker process, with a copy of the model and only the desired position of the controller.
+# GIF segments are stored as .npy palette-index frames, which are joined without decoding.
+def write_segment(model, xd, time_axis, state_list, u_list, path, indexes, fps, dpi, palette):
+    from src.Simulator import Simulator
+    sim = Simulator(model, SimpleNamespace(xd=xd) if xd is not None else None)
+    sim.time_axis, sim.state_list, sim.u_list = time_axis, state_list, u_list
+    if palette is None:
+        write_ffmpeg(path, render_frames(sim, indexes, dpi), fps)
+        return
+    segment = None
+    for k, frame in enumerate(quantized_frames(sim, indexes, dpi, palette)):
+        if segment is None:
+            segment = np.lib.format.open_memmap(path, mode='w+', dtype=np.uint8, shape=(len(indexes),) + frame.shape)
+        segment[k] = frame
+    segment.flush()
+
+
+# Concatenate the segments into one file
+def concatenate(paths, path, fps, palette):
+    if palette is not None:
+        write_gif(path, (frame for segment in paths for frame in np.load(segment, mmap_mode='r')), fps, palette)
+        return
+
+    # ffmpeg concat demuxer, the segments are copied without re-encoding
+    listing = os.path.join(os.path.dirname(paths[0]), 'segments.txt')
+    with open(listing, 'w') as f:
+        f.writelines("file '%s'\n" % os.path.abspath(segment) for segment in paths)
+    subprocess.run(['ffmpeg', '-y', '-loglevel', 'error', '-f', 'concat', '-safe', '0', '-i', listing, '-c', 'copy',
+                    path], check=True)
+
+
+# Export the data recorded by a Simulator at fps frames per second of simulated time, split over 'workers' processes.
+# The format follows from the extension: GIF with Pillow, anything else (e.g. MP4) with ffmpeg.
+def export_video(sim, path, fps=30, workers=1, dpi=100):
+    if not path.lower().endswith('.gif') and shutil.which('ffmpeg') is None:
+        raise RuntimeError('Exporting %s requires ffmpeg, which was not found on the PATH; export a .gif instead'
+                           % path)
+
+    # Samples shown in the frames
+    step = max(1, int(round(1 / (fps * sim.delta_t))))
+    indexes = np.arange(0, len(sim.time_axis), step)
+    fps = 1 / (step * sim.delta_t)
+    palette = gif_palette(sim, dpi) if path.lower().endswith('.gif') else None
+
+    if workers == 1:
+        if palette is None:
+            write_ffmpeg(path, render_frames(sim, indexes, dpi), fps)
+        else:
+            write_gif(path, quantized_frames(sim, indexes, dpi, palette), fps, palette)
+        return
+
+    # Segments of consecutive frames rendered in parallel, with a model copy without the bound controller
+    model = copy.copy(sim.model)
+    model.controller = None
+    xd = sim.control.xd if sim.control else None
+    time_axis, state_list, u_list = (np.asarray(a) for a in (sim.time_axis, sim.state_list, sim.u_list))
+    directory = tempfile.mkdtemp()
+    try:
+        extension = '.npy' if palette is not None else os.path.splitext(path)[1]
+        paths = [os.path.join(directory, 'segment%d%s' % (k, extension)) for k in range(workers)]
+        with ProcessPoolExecutor(workers) as executor:
+            futures = [executor.submit(write_segment, model, xd, time_axis, state_list, u_list, segment, part, fps, dpi,
+                                       palette)
+                       for segment, part in zip(paths, np.array_split(indexes, workers)) if len(part)]
+            for future in futures:
+                future.result()
+        concatenate(paths[:len(futures)], path, fps, palette)
+    finally:
+        shutil.rmtree(directory)
@@ -1,58 +1,76 @@
 import numpy as np
+import scipy.linalg
+
+from src.SynthesisCache import synthesis_cache
+from src.controllers.PredictionMatrices import prediction
 
 
 class Control:
-    
-    def __init__(self, model):
-        
+
+    def __init__(self, model, method='dense', N=100):
+
         # Bind model
         self.model = model
-        
+
+        # Solution method: 'dense' for the stacked least squares solution or 'riccati' for the backward recursion
+        assert method in ('dense', 'riccati')
+        self.method = method
+
         # Desired x_pos
         self.xd = 0.0
-        
+
         # Control parameters
-        self.N = 100  # Prediction and control horizon
+        self.N = N  # Prediction and control horizon
 
         # Control parameters
         if self.model.name == 'Pendulum':
-            self.Q = np.mat([[100, 0, 0, 0], [0, 10, 0, 0], [0, 0, 1, 0], [0, 0, 0, 1]])
-            self.R = np.mat(np.identity(1))
-            self.P = np.mat([[1000, 0.0, 0.0, 0.0], [0.0, 1.0, 0.0, 0.0], [0.0, 0.0, 1.0, 0.0], [0.0, 0.0, 0.0, 1.0]])
+            self.Q = np.array([[100, 0, 0, 0], [0, 10, 0, 0], [0, 0, 1, 0], [0, 0, 0, 1]])
+            self.R = np.identity(1)
+            self.P = np.array([[1000, 0.0, 0.0, 0.0], [0.0, 1.0, 0.0, 0.0], [0.0, 0.0, 1.0, 0.0], [0.0, 0.0, 0.0, 1.0]])
         else:
-            self.Q = np.mat([[1.0, 0.0], [0.0, 1.0]])
-            self.R = np.mat(np.identity(1))
-            self.P = np.mat([[1.0, 0.0], [0.0, 1.0]])
+            self.Q = np.array([[1.0, 0.0], [0.0, 1.0]])
+            self.R = np.identity(1)
+            self.P = np.array([[1.0, 0.0], [0.0, 1.0]])
+
+        # Compute the feedback gain
+        self.synthesize()
+
+    # Assigning the model, N, Q, R or P invalidates the synthesized gain, which is then recomputed at the next control
+    # call. After changing the model parameters or the weights in place, call invalidate() explicitly.
+    def __setattr__(self, name, value):
+        if name in ('model', 'method', 'N', 'Q', 'R', 'P'):
+            self.invalidate()
+        object.__setattr__(self, name, value)
+
+    def invalidate(self):
+        object.__setattr__(self, 'synthesized', False)
+
+    # Compute and store the feedback gain of the first control signal, u0 = -gain @ x0
+    def synthesize(self):
 
         # Get dynamics
-        A = np.mat(self.model.A_disc)
-        B = np.mat(self.model.B_disc)
-
-        # Calculate matrix relating initial state to all successive states
-        Ahat = np.eye(len(A))
-        for i in range(self.N):
-            An = np.linalg.matrix_power(A, i + 1)
-            Ahat = np.r_[Ahat, An]
-        Ahat = Ahat[len(A):, :]
-
-        # Calculate matrix relating control signals to successive states
-        Cbar = np.zeros((len(A), self.N))
-        for i in range(self.N):
-            tmp = None
-            for ii in range(i + 1):
-                tm = np.linalg.matrix_power(A, ii) * B
-                if tmp is None:
-                    tmp = tm
-                else:
-                    tmp = np.c_[tm, tmp]
-            for _ in np.arange(i, self.N - 1):
-                tm = np.zeros(B.shape)
-                if tmp is None:
-                    tmp = tm
-                else:
-                    tmp = np.c_[tmp, tm]
-            Cbar = np.r_[Cbar, tmp]
-        Cbar = Cbar[len(A):, :]
+        A = np.asarray(self.model.A_disc)
+        B = np.asarray(self.model.B_disc)
+
+        # Time-varying gains (N, 1, n) of the backward Riccati recursion
+        if self.method == 'riccati':
+            self.K = synthesis_cache.get('finite_horizon_riccati', (A, B, self.Q, self.R, self.P, self.N), lambda: (
+                self.riccati(A, B),))[0]
+            self.gain = self.K[0][0]
+            object.__setattr__(self, 'synthesized', True)
+            return
+
+        # Dense solution, or reuse it from the synthesis cache
+        self.H, self.F_trans, c, self.gain = synthesis_cache.get(
+            'finite_horizon_dense', (A, B, self.Q, self.R, self.P, self.N), lambda: self.dense(A, B))
+        self.H_factor = (c, False)
+        object.__setattr__(self, 'synthesized', True)
+
+    # Compute H, F_trans, the Cholesky factor of H and the feedback gain of the stacked least squares solution
+    def dense(self, A, B):
+
+        # Calculate matrices relating the initial state and the control signals to all successive states
+        Ahat, Cbar = prediction(A, B, self.N)
 
         # Calculate penalty matrices
         tm1 = np.eye(self.N)
@@ -63,21 +81,66 @@ class Control:
         Rbar = np.kron(np.eye(self.N), self.R)
 
         # Calculate objective derivative solution
-        self.H = Cbar.T * Qbar * Cbar + Rbar
-        self.F_trans = Ahat.T * Qbar * Cbar
-    
+        H = Cbar.T @ Qbar @ Cbar + Rbar
+        F_trans = Ahat.T @ Qbar @ Cbar
+
+        # Factorize H once, the optimal sequence is uopt = -H^-1 F_trans' x0 and its first row is the feedback gain
+        c, lower = scipy.linalg.cho_factor(H)
+        gain = scipy.linalg.cho_solve((c, lower), F_trans.T)[0, :]
+        return H, F_trans, c, gain
+
+    # Compute the optimal gains K_0 ... K_N-1 of u_k = -K_k x_k, as an (N, 1, n) array, with a backward Riccati
+    # recursion in O(N)
+    def riccati(self, A, B):
+        K = []
+        S = self.P
+        for _ in range(self.N):
+            Kk = np.linalg.solve(self.R + B.T @ S @ B, B.T @ S @ A)
+            S = self.Q + A.T @ S @ (A - B @ Kk)
+            K.append(Kk)
+        return np.array(K[::-1])
+
     def set_desired_position(self, x):
         self.xd = x
-    
+
+    # The receding horizon law is linear state feedback u = -gain x, which lets rollouts skip the control calls
+    def linear_feedback(self):
+        if not self.synthesized:
+            self.synthesize()
+        return self.gain, 0.0
+
+    # Optimal control sequence u0 ... uN-1 over the whole horizon
+    def full_sequence(self, state):
+
+        if not self.synthesized:
+            self.synthesize()
+
+        # Initial state as (n,) array, (n, 1) columns are accepted for compatibility
+        x0 = np.asarray(state, dtype=float).ravel()
+
+        # Roll out the time-varying gains on the linearized model
+        if self.method == 'riccati':
+            A = np.asarray(self.model.A_disc)
+            B = np.asarray(self.model.B_disc)
+            uopt = np.zeros(self.N)
+            x = x0
+            for k in range(self.N):
+                uopt[k] = -self.K[k][0] @ x
+                x = A @ x + B[:, 0] * uopt[k]
+            return uopt
+
+        # Solve for optimal control with the factorized H
+        return -scipy.linalg.cho_solve(self.H_factor, self.F_trans.T @ x0)
+
     def control(self, state):
 
-        # Initial state
-        x0 = np.reshape(np.mat(state), (len(state), 1))
-        
-        # Solve for optimal control
-        uopt = -self.H.I * self.F_trans.T * x0
+        if not self.synthesized:
+            self.synthesize()
+
+        # Initial state as (n,) array, (n, 1) columns are accepted for compatibility
+        x0 = np.asarray(state, dtype=float).ravel()
 
-        # Take only first control signal
-        u = uopt[0]
+        # Only the first control signal is needed
+        u = -self.gain @ x0
 
         return u
@@ -1,6 +1,8 @@
 import numpy as np
 import scipy.linalg
 
+from src.SynthesisCache import synthesis_cache
+
 
 class Control:
     
@@ -19,38 +21,48 @@ class Control:
             self.Q = np.array([[1, 0], [0, 1]])
         self.R = np.identity(1)
         
-        # Compute optimal K
-        self.K = self.lqr(self.model.A_cont, self.model.B_cont, self.Q, self.R)
+        # Compute optimal K, or reuse it from the synthesis cache
+        self.K = synthesis_cache.get('lqr', (self.model.A_cont, self.model.B_cont, self.Q, self.R), lambda: (
+            self.lqr(self.model.A_cont, self.model.B_cont, self.Q, self.R),))[0]
 
         ### Only for pendulum on cart, to track desired x position ###
 
         # Closed loop system matrix
-        Acl = self.model.A_cont - self.model.B_cont * self.K
+        Acl = self.model.A_cont - self.model.B_cont @ self.K
 
         # DC gain
-        Kdc = self.model.C * np.linalg.inv(Acl) * self.model.B_cont
+        Kdc = np.atleast_2d(self.model.C) @ np.linalg.inv(Acl) @ self.model.B_cont
 
         # Reference gain
-        self.Kr = - 1 / Kdc[0]
+        self.Kr = - 1 / Kdc[0, 0]
     
     def set_desired_position(self, x):
         self.xd = x
+
+    # The control law is linear state feedback u = -K x + r, which lets rollouts skip the control calls
+    def linear_feedback(self):
+        if self.model.name == "Pendulum":
+            return self.K, self.xd * self.Kr
+        return self.K, 0.0
     
     def lqr(self, A, B, Q, R):
         
         # Solve the ricatti equation
-        X = np.mat(scipy.linalg.solve_continuous_are(A, B, Q, R))
+        X = scipy.linalg.solve_continuous_are(A, B, Q, R)
         
         # Compute the LQR gain
-        K = np.mat(scipy.linalg.inv(R) * (B.T * X))
+        K = scipy.linalg.inv(R) @ (B.T @ X)
         
         return K
     
     def control(self, state):
 
+        # State as (n,) array, (n, 1) columns are accepted for compatibility
+        x = np.asarray(state, dtype=float).ravel()
+
         # Control signal
         if self.model.name == "Pendulum":
-            u = - self.K * state + self.xd * self.Kr
+            u = - self.K[0] @ x + self.xd * self.Kr
         else:
-            u = - self.K * state
+            u = - self.K[0] @ x
         return u
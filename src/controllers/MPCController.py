@@ -1,84 +1,233 @@
-import cvxpy
+import time
+from collections import deque
+
 import numpy as np
+import scipy.linalg
+
+from src.SynthesisCache import synthesis_cache
+from src.controllers.PredictionMatrices import prediction, sparse_dynamics, sparse_penalties
 
 
 class Control:
     
-    def __init__(self, model):
+    def __init__(self, model, backend='cvxpy', N=100):
         
         # Bind model
         self.model = model
+
+        # Solver backend: 'cvxpy' for the full QP or 'condensed' for the input-only QP solved with an active set method
+        assert backend in ('cvxpy', 'condensed')
+        self.backend = backend
         
         # Desired x_pos
         self.xd = 0.0
         
         # Control parameters
-        self.N = 100
+        self.N = N
         
         # Control limits
-        self.umax = np.reshape(np.repeat(10, self.N), (self.N, 1))
-        self.xmax = np.reshape(np.repeat(1, 4 * self.N), (4 * self.N, 1))
+        self.umax = np.repeat(10.0, self.N)
+        self.xmax = np.repeat(1.0, 4 * self.N)
 
         # Control parameters
         if self.model.name == 'Pendulum':
-            self.Q = np.mat([[100, 0, 0, 0], [0, 10, 0, 0], [0, 0, 1, 0], [0, 0, 0, 1]])
-            self.R = np.mat(np.identity(1))
-            self.P = np.mat([[1000, 0.0, 0.0, 0.0], [0.0, 1.0, 0.0, 0.0], [0.0, 0.0, 1.0, 0.0], [0.0, 0.0, 0.0, 1.0]])
+            self.Q = np.array([[100, 0, 0, 0], [0, 10, 0, 0], [0, 0, 1, 0], [0, 0, 0, 1]])
+            self.R = np.identity(1)
+            self.P = np.array([[1000, 0.0, 0.0, 0.0], [0.0, 1.0, 0.0, 0.0], [0.0, 0.0, 1.0, 0.0], [0.0, 0.0, 0.0, 1.0]])
         else:
-            self.Q = np.mat([[1.0, 0.0], [0.0, 1.0]])
-            self.R = np.mat(np.identity(1))
-            self.P = np.mat([[1.0, 0.0], [0.0, 1.0]])
+            self.Q = np.array([[1.0, 0.0], [0.0, 1.0]])
+            self.R = np.identity(1)
+            self.P = np.array([[1.0, 0.0], [0.0, 1.0]])
 
         # Get dynamics
-        A = np.mat(self.model.A_disc)
-        B = np.mat(self.model.B_disc)
-
-        # Alternative to calculating Abar, Bbar, Cbar, and Ahat
-        Abar = np.vstack((np.zeros((len(A), self.N*len(A))), np.hstack((np.kron(np.eye(self.N-1), A),
-        np.zeros((len(A)*(self.N-1), len(A)))))))
-        Bbar = np.kron(np.eye(self.N), B)
-        self.Ahat = (np.identity(np.shape(Abar)[0]) - Abar).I * np.kron(np.identity(self.N), A)[:, 0:len(A)]
-        self.Cbar = (np.identity(np.shape(Abar)[0]) - Abar).I * Bbar
-
-        # Calculate penalty matrices
-        tm1 = np.eye(self.N)
-        tm1[self.N - 1, self.N - 1] = 0
-        tm2 = np.zeros((self.N, self.N))
-        tm2[self.N - 1, self.N - 1] = 1
-        self.Qbar = np.kron(tm1, self.Q) + np.kron(tm2, self.P)
-        self.Rbar = np.kron(np.eye(self.N), self.R)
-    
+        A = np.asarray(self.model.A_disc)
+        B = np.asarray(self.model.B_disc)
+
+        # Sparse block-banded prediction (Ax x = Bx u + Ex x0) and penalty matrices
+        self.Ax, self.Bx, self.Ex = sparse_dynamics(A, B, self.N)
+        self.Qbar, self.Rbar = sparse_penalties(self.Q, self.R, self.P, self.N)
+
+        # Stacked reference states, with the desired position as first state
+        n = len(A)
+        self.ref_direction = np.tile(np.eye(n)[0], self.N)
+
+        # Solve times of the last 10000 control calls (s), bounded for long and real-time runs
+        self.solve_times = deque(maxlen=10000)
+
+        # Build the optimization problem of the backend
+        if self.backend == 'cvxpy':
+            self.build_problem()
+        else:
+            self.build_condensed()
+
+    # Build the cvxpy problem once, it is only re-solved with new parameter values. cvxpy is only imported by this
+    # backend, on first use.
+    def build_problem(self):
+        import cvxpy
+
+        # Optimization variables
+        n = self.Ex.shape[1]
+        self.u = cvxpy.Variable(self.N)
+        self.x = cvxpy.Variable(self.N * n)
+
+        # Parameters: initial state and desired position
+        self.x0 = cvxpy.Parameter(n)
+        self.xd_param = cvxpy.Parameter()
+
+        # Compute cost, the reference states xref = xd * ref_direction only add a linear term -xref' Qbar x
+        Qref = self.Qbar @ self.ref_direction
+        cost = 0.5 * cvxpy.quad_form(self.x, cvxpy.psd_wrap(self.Qbar)) - self.xd_param * (Qref @ self.x)
+        cost += 0.5 * cvxpy.quad_form(self.u, cvxpy.psd_wrap(self.Rbar))
+
+        # Create state constraints
+        constr = [self.Ax @ self.x == self.Bx @ self.u + self.Ex @ self.x0]
+
+        # Create control constraints
+        constr += [self.u <= self.umax, -self.u <= self.umax]
+
+        # Create problem
+        self.prob = cvxpy.Problem(cvxpy.Minimize(cost), constr)
+
+    # Condense the QP to the inputs only: min 0.5 u' H u + f' u s.t. |u| <= umax, with f = G x0 - Gr xd
+    def build_condensed(self):
+
+        # Condensed matrices, or reuse them from the synthesis cache
+        A = np.asarray(self.model.A_disc)
+        B = np.asarray(self.model.B_disc)
+        self.H, self.G, self.Gr, c = synthesis_cache.get(
+            'mpc_condensed', (A, B, self.Q, self.R, self.P, self.N), lambda: self.condense(A, B))
+
+        # Cholesky factor of H, used whenever no input limit is active
+        self.H_factor = (c, False)
+
+        # Active set solver settings and warm start (inputs at the upper and at the lower limit)
+        self.max_iter = 50
+        self.iterations = 0
+        self.upper = np.zeros(self.N, dtype=bool)
+        self.lower = np.zeros(self.N, dtype=bool)
+
+        # Largest eigenvalue of H, computed on first use by the projected gradient fallback
+        self.H_norm = None
+
+    # Compute H, G, Gr and the Cholesky factor of H from the dense prediction matrices x = Ahat x0 + Cbar u
+    def condense(self, A, B):
+        Ahat, Cbar = prediction(A, B, self.N)
+        QC = self.Qbar @ Cbar
+        H = Cbar.T @ QC + self.Rbar.toarray()
+        G = QC.T @ Ahat
+        Gr = QC.T @ self.ref_direction
+        c, _ = scipy.linalg.cho_factor(H)
+        return H, G, Gr, c
+
+    # Solve the condensed box-constrained QP. The primal-dual active set method is warm-started from the previous
+    # active sets; after a jump of the state it can cycle, it is then restarted from empty active sets, and if that
+    # does not converge either the QP is solved by projected gradient.
+    def solve_condensed(self, x0):
+
+        # Linear cost term
+        f = self.G @ x0 - self.Gr * self.xd
+        umax = self.umax
+
+        # Start from the active sets of the previous solution, then from a cold start
+        u, upper, lower = self.active_set(f, self.upper, self.lower)
+        if u is None:
+            u, upper, lower = self.active_set(f, np.zeros(self.N, dtype=bool), np.zeros(self.N, dtype=bool))
+        if u is None:
+            u = self.projected_gradient(f)
+            upper = u >= umax
+            lower = u <= -umax
+
+        # Active sets of the next control call, shifted by one time step
+        self.upper = np.r_[upper[1:], upper[-1]]
+        self.lower = np.r_[lower[1:], lower[-1]]
+
+        return u
+
+    # Primal-dual active set method starting from the given active sets (inputs at the upper and at the lower limit).
+    # Returns the solution and its active sets, or None if it did not converge within max_iter iterations.
+    def active_set(self, f, upper, lower):
+        umax = self.umax
+        for self.iterations in range(1, self.max_iter + 1):
+
+            # Fix the active inputs at their limits and solve for the free inputs
+            u = np.where(upper, umax, np.where(lower, -umax, 0.0))
+            free = ~(upper | lower)
+            if free.all():
+                u = scipy.linalg.cho_solve(self.H_factor, -f)
+            elif free.any():
+                rhs = -(f[free] + self.H[np.ix_(free, ~free)] @ u[~free])
+                u[free] = scipy.linalg.cho_solve(scipy.linalg.cho_factor(self.H[np.ix_(free, free)]), rhs)
+
+            # Multipliers of the active limits, positive at the upper and negative at the lower limit
+            mu = -(self.H @ u + f)
+            mu[free] = 0.0
+
+            # Update the active sets, the solution is optimal when they no longer change
+            new_upper = mu + (u - umax) > 0
+            new_lower = mu + (u + umax) < 0
+            if np.array_equal(new_upper, upper) and np.array_equal(new_lower, lower):
+                return u, upper, lower
+            upper = new_upper
+            lower = new_lower
+        return None, upper, lower
+
+    # Accelerated projected gradient method (FISTA) with step 1 / L, L the largest eigenvalue of H. It converges
+    # from any start, but slower than the active set method.
+    def projected_gradient(self, f, tol=1e-10, max_iter=100000):
+        if self.H_norm is None:
+            self.H_norm = scipy.linalg.eigvalsh(self.H, subset_by_index=[self.N - 1, self.N - 1])[0]
+        umax = self.umax
+        u = np.clip(scipy.linalg.cho_solve(self.H_factor, -f), -umax, umax)
+        y = u
+        t = 1.0
+        for _ in range(max_iter):
+            u_new = np.clip(y - (self.H @ y + f) / self.H_norm, -umax, umax)
+            if np.max(np.abs(u_new - u)) < tol:
+                return u_new
+            t_new = (1 + np.sqrt(1 + 4 * t ** 2)) / 2
+            y = u_new + (t - 1) / t_new * (u_new - u)
+            u, t = u_new, t_new
+        return u
+
+    # Solve the cvxpy problem with OSQP at tight tolerances and polishing of the solution on its active set, so that
+    # the optimum matches the dense formulation. Returns True if the solution is optimal.
+    def solve(self, warm_start):
+        import cvxpy
+        try:
+            self.prob.solve(solver=cvxpy.OSQP, warm_start=warm_start, verbose=False, eps_abs=1e-6, eps_rel=1e-6,
+                            polish=True, polish_refine_iter=10, max_iter=100000)
+        except cvxpy.error.SolverError:
+            return False
+        return self.prob.status == 'optimal'
+
     def set_desired_position(self, x):
         self.xd = x
     
     def control(self, state):
 
-        # Initial state
-        x0 = np.reshape(np.mat(state), (len(state), 1))
+        # Initial state as (n,) array, (n, 1) columns are accepted for compatibility
+        x0 = np.asarray(state, dtype=float).ravel()
 
-        # Set optimization variables
-        u = cvxpy.Variable((self.N, 1))
-        x = cvxpy.Variable((self.N * len(state), 1))
-        
-        # Ccompute cost
-        cost = 0.5 * cvxpy.quad_form(x, self.Qbar)
-        cost += 0.5 * cvxpy.quad_form(u, self.Rbar)
-        
-        # Create state constraints
-        constr = [x == self.Cbar @ u + self.Ahat @ x0]
-        
-        # Create control constraints
-        constr += [np.vstack((np.identity(self.N), -np.identity(self.N))) @ u <= np.vstack((self.umax, self.umax))]
+        # Condensed backend
+        if self.backend == 'condensed':
+            t0 = time.perf_counter()
+            u = self.solve_condensed(x0)[0]
+            self.solve_times.append(time.perf_counter() - t0)
+            return u
+
+        # Set parameters
+        self.x0.value = x0
+        self.xd_param.value = self.xd
+
+        # Solve problem, starting from the previous solution. After a large jump of the state the warm-started solver
+        # can fail or stop at an inaccurate solution, it is then solved again from scratch.
+        t0 = time.perf_counter()
+        optimal = self.solve(warm_start=True) or self.solve(warm_start=False)
+        self.solve_times.append(time.perf_counter() - t0)
 
-        # Create problem
-        prob = cvxpy.Problem(cvxpy.Minimize(cost), constr)
-        
-        # Solve problem
-        prob.solve(verbose=False)
-        
         # Get optimal result
-        if prob.status == cvxpy.OPTIMAL:
-            ou = np.array(u.value[0, :]).flatten()
+        if optimal:
+            ou = self.u.value
         else:
             ou = [0.0]
         
@@ -1,3 +1,6 @@
+import numpy as np
+
+
 class Control:
     
     def __init__(self, model):
@@ -19,6 +22,9 @@ class Control:
     
     def control(self, state):
 
+        # State as (n,) array, (n, 1) columns are accepted for compatibility
+        state = np.asarray(state, dtype=float).ravel()
+
         if self.model.name == 'Pendulum':
             # Theta control
             error_theta = (state[2] - 0)
@@ -1,6 +1,7 @@
-import control
 import numpy as np
 
+from src.SynthesisCache import synthesis_cache
+
 
 class Control:
     
@@ -17,26 +18,40 @@ class Control:
             desired_eigenvalues = [-2, -8, -9, -10]
         else:
             desired_eigenvalues = [-9, -10]
-        self.K = control.place(self.model.A_cont, self.model.B_cont, desired_eigenvalues)
+        self.K = synthesis_cache.get('place', (self.model.A_cont, self.model.B_cont, desired_eigenvalues), lambda: (
+            self.place(self.model.A_cont, self.model.B_cont, desired_eigenvalues),))[0]
 
         # Closed loop system matrix
-        Acl = self.model.A_cont - self.model.B_cont * self.K
+        Acl = self.model.A_cont - self.model.B_cont @ self.K
 
         # DC gain
-        Kdc = self.model.C * np.linalg.inv(Acl) * self.model.B_cont
+        Kdc = np.atleast_2d(self.model.C) @ np.linalg.inv(Acl) @ self.model.B_cont
 
         # Reference gain
-        self.Kr = - 1 / Kdc[0]
+        self.Kr = - 1 / Kdc[0, 0]
     
     def set_desired_position(self, x):
         self.xd = x
+
+    # Place the poles with python-control, which is only imported when a gain is not in the synthesis cache
+    def place(self, A, B, eigenvalues):
+        import control
+        return control.place(A, B, eigenvalues)
+
+    # The control law is linear state feedback u = -K x + r, which lets rollouts skip the control calls
+    def linear_feedback(self):
+        if self.model.name == "Pendulum":
+            return self.K, self.xd * self.Kr
+        return self.K, 0.0
     
     def control(self, state):
 
+        # State as (n,) array, (n, 1) columns are accepted for compatibility
+        x = np.asarray(state, dtype=float).ravel()
+
         # Control signal
         if self.model.name == "Pendulum":
-            u = - self.K * state + self.xd * self.Kr
+            u = - self.K[0] @ x + self.xd * self.Kr
         else:
-            u = - self.K * state
+            u = - self.K[0] @ x
         return u
-
@@ -0,0 +1,58 @@
+import numpy as np
+import scipy.sparse
+
+from src.SynthesisCache import synthesis_cache
+
+# Prediction and penalty matrices over a horizon of N steps, for the stacked states x = [x1; ...; xN] and inputs
+# u = [u0; ...; uN-1] of the discrete system x(k+1) = A x(k) + B u(k).
+
+
+# Sparse (CSC) block-banded prediction: Ax x = Bx u + Ex x0, with Ax = I - Abar and Abar the block subdiagonal of A's
+def sparse_dynamics(A, B, N):
+    A = scipy.sparse.csc_matrix(np.asarray(A, dtype=float))
+    B = scipy.sparse.csc_matrix(np.asarray(B, dtype=float))
+    n = A.shape[0]
+    Ax = scipy.sparse.identity(n * N, format='csc') - scipy.sparse.kron(scipy.sparse.eye(N, k=-1), A, format='csc')
+    Bx = scipy.sparse.kron(scipy.sparse.identity(N), B, format='csc')
+    Ex = scipy.sparse.kron(scipy.sparse.csc_matrix(([1.0], ([0], [0])), shape=(N, 1)), A, format='csc')
+    return Ax, Bx, Ex
+
+
+# Sparse (CSC) block diagonal penalties: Q on x1 ... xN-1, P on xN and R on all inputs
+def sparse_penalties(Q, R, P, N):
+    tm1 = np.ones(N)
+    tm1[N - 1] = 0
+    tm2 = np.zeros(N)
+    tm2[N - 1] = 1
+    Qbar = (scipy.sparse.kron(scipy.sparse.diags(tm1), np.asarray(Q, dtype=float)) +
+            scipy.sparse.kron(scipy.sparse.diags(tm2), np.asarray(P, dtype=float))).tocsc()
+    Rbar = scipy.sparse.kron(scipy.sparse.identity(N), np.asarray(R, dtype=float), format='csc')
+    return Qbar, Rbar
+
+
+# Dense Ahat and Cbar with x = Ahat x0 + Cbar u, filled from the incrementally computed powers of A. The result is
+# cached in the synthesis cache.
+def prediction(A, B, N):
+    A = np.asarray(A, dtype=float)
+    B = np.asarray(B, dtype=float)
+    return synthesis_cache.get('prediction', (A, B, N), lambda: compute_prediction(A, B, N))
+
+
+def compute_prediction(A, B, N):
+    n, m = B.shape
+
+    # Powers A^0 ... A^N
+    powers = np.empty((N + 1, n, n))
+    powers[0] = np.identity(n)
+    for k in range(N):
+        powers[k + 1] = A @ powers[k]
+    Ahat = powers[1:].reshape(N * n, n)
+
+    # Block-Toeplitz Cbar, block (i, j) is A^(i-j) B for i >= j
+    AB = powers[:N] @ B
+    Cbar = np.zeros((N, n, N, m))
+    i, j = np.tril_indices(N)
+    Cbar[i, :, j, :] = AB[i - j]
+    Cbar = Cbar.reshape(N * n, N * m)
+
+    return Ahat, Cbar
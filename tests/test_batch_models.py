@@ -0,0 +1,37 @@
+import numpy as np
+
+from src.BalancingRobot import BalancingRobot
+from src.BalancingRobotBatch import BalancingRobotBatch
+from src.InvertedPendulum import InvertedPendulum
+from src.InvertedPendulumBatch import InvertedPendulumBatch
+
+
+# Every environment of a batch model follows the scalar model with the same parameters bit for bit
+def check_batch(scalar, batch, params, x0s, steps=3000):
+    rng = np.random.default_rng(0)
+    models = []
+    for b, x0 in enumerate(x0s):
+        model = scalar()
+        model.set_parameters(**{name: values[b] for name, values in params.items()})
+        model.set_state(x0)
+        models.append(model)
+    batch.set_state(x0s)
+    for u in rng.normal(0, 3, (steps, len(x0s))):
+        batch.step_cont(u)
+        for b, model in enumerate(models):
+            model.step_cont(u[b], out=model.state)
+            np.testing.assert_array_equal(batch.state[b], model.state)
+
+
+def test_pendulum_batch_matches_scalar():
+    params = {'m': [0.5, 0.45, 0.55], 'M': [1.0, 0.9, 1.1], 'l': [0.5, 0.45, 0.55], 'b_theta': [0.5, 0.45, 0.55],
+              'b_x': [1.0, 0.9, 1.1]}
+    x0s = np.array([[-0.3, 0.0, 0.1, 0.0], [0.2, 0.1, -0.2, 0.3], [0.0, -0.2, 0.4, -0.1]])
+    check_batch(InvertedPendulum, InvertedPendulumBatch(3, **{k: np.array(v) for k, v in params.items()}), params,
+                x0s)
+
+
+def test_robot_batch_matches_scalar():
+    params = {'m': [1.0, 0.9, 1.1], 'l': [0.5, 0.45, 0.55], 'b_theta': [0.5, 0.45, 0.55]}
+    x0s = np.array([[0.1, 0.0], [-0.2, 0.3], [0.3, -0.1]])
+    check_batch(BalancingRobot, BalancingRobotBatch(3, **{k: np.array(v) for k, v in params.items()}), params, x0s)
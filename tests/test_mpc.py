@@ -0,0 +1,25 @@
+import numpy as np
+
+from src.InvertedPendulum import InvertedPendulum
+from src.controllers import MPCController
+
+
+# After a jump of the state the warm-started active set method cycles, the condensed backend has to restart and
+# still agree with the cvxpy backend
+def test_condensed_matches_cvxpy_after_state_jump():
+    model = InvertedPendulum()
+    condensed = MPCController.Control(model, backend='condensed')
+    cvxpy = MPCController.Control(model)
+    for state in [[0.57, 0.58, -0.54, -0.26], [-0.83, -0.61, -0.34, 0.72]]:
+        state = np.array(state)
+        assert abs(condensed.control(state) - cvxpy.control(state)) < 1e-4
+
+
+def test_condensed_warm_start_matches_cold_start():
+    model = InvertedPendulum()
+    controller = MPCController.Control(model, backend='condensed')
+    rng = np.random.default_rng(0)
+    for _ in range(50):
+        state = rng.uniform([-1, -1, -0.6, -1], [1, 1, 0.6, 1])
+        cold = MPCController.Control(model, backend='condensed').control(state)
+        assert abs(controller.control(state) - cold) < 1e-8
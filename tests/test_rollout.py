@@ -0,0 +1,29 @@
+import numpy as np
+
+from src.Engine import run
+from src.Integrators import RK4
+from src.InvertedPendulum import InvertedPendulum
+from src.Rollout import rollout
+from src.controllers import LQRController
+
+
+# Models with an integrator the kernels do not implement are stepped by the engine
+def test_rollout_rk4_falls_back_to_engine():
+    x0s = np.array([[-0.3, 0.0, 0.1, 0.0], [0.2, 0.0, -0.1, 0.0]])
+    model = InvertedPendulum(RK4())
+    controller = LQRController.Control(model)
+    time_axis, states, u_list = rollout(model, controller, x0s, steps=200)
+    assert states.shape == (2, 200, 4) and u_list.shape == (2, 200)
+
+    for b, x0 in enumerate(x0s):
+        model = InvertedPendulum(RK4())
+        model.set_state(x0)
+        _, state_list, us = run(model, LQRController.Control(model), 200)
+        np.testing.assert_array_equal(states[b], state_list)
+        np.testing.assert_array_equal(u_list[b], us)
+
+
+def test_rollout_rk4_open_loop():
+    model = InvertedPendulum(RK4())
+    _, states, _ = rollout(model, None, [0.0, 0.0, 0.1, 0.0], steps=50)
+    assert states.shape == (1, 50, 4) and np.isfinite(states).all()
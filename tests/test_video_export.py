@@ -0,0 +1,37 @@
+import shutil
+
+import numpy as np
+import pytest
+
+from src.InvertedPendulum import InvertedPendulum
+from src.Simulator import Simulator
+from src.controllers import LQRController
+
+
+def simulator(frames=30):
+    model = InvertedPendulum()
+    model.set_state(np.array([-0.3, 0.0, 0.1, 0.0]))
+    sim = Simulator(model, LQRController.Control(model), frames=frames)
+    sim.simulate(animate=False)
+    return sim
+
+
+@pytest.mark.skipif(shutil.which('ffmpeg') is None, reason='ffmpeg is not installed')
+def test_export_mp4(tmp_path):
+    path = str(tmp_path / 'video.mp4')
+    simulator().export(path, fps=30, dpi=50)
+    assert (tmp_path / 'video.mp4').stat().st_size > 0
+
+
+@pytest.mark.skipif(shutil.which('ffmpeg') is not None, reason='ffmpeg is installed')
+def test_export_mp4_without_ffmpeg(tmp_path):
+    with pytest.raises(RuntimeError, match='ffmpeg'):
+        simulator().export(str(tmp_path / 'video.mp4'))
+
+
+def test_export_gif(tmp_path):
+    path = tmp_path / 'video.gif'
+    simulator().export(str(path), fps=30, dpi=50)
+    from PIL import Image
+    with Image.open(path) as image:
+        assert image.n_frames == 10